@@ -0,0 +1,163 @@
+# Checks that the optimized code paths in 'ucrb' give the same numbers as the logic of the original
+# task scripts, on the real data in 'raw_data'. The original logic is written out again below (read
+# the raw csv/xlsx files, loop over the sites, scipy/statistics/matplotlib per group) and compared
+# with what the store, the joins and the batched stats return:
+#   task 1  box plot stats           boxplots.box_stats             vs matplotlib.cbook.boxplot_stats
+#   task 2  monthly mean / std dev   aggregate.monthly_stats        vs statistics.mean / stdev
+#   task 3  flow + ET join           datasets._join_flow_et         vs the merge on the 'YYYY-MM' date
+#   task 3  fits and correlations    stats.correlation_stats        vs numpy.polyfit, scipy pearsonr / kendalltau
+#   task 4  growing season flow      aggregate.stream_season_means  vs the mean of Apr - Sept of every year
+#   task 7  correlation matrices     matrices.correlation_matrices  vs DataFrame.corr and scipy
+#
+# Usage: python benchmarks/equivalence.py      (exits with 1 if anything differs)
+import os
+import statistics
+import sys
+
+import numpy as np
+import pandas as pd
+from matplotlib import cbook
+from scipy import stats as sp_stats
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from ucrb import aggregate, boxplots, datasets, matrices, months, stats, stations, store
+
+RTOL = 1e-7
+ATOL = 1e-10
+
+CFS_VARS = ['median_cfs', 'Q25_cfs']
+MATRIX_VARS = ['gs_pr', 'ann_pr', 'wy_pr', 'gs_et', 'gs_etof', 'gs_eto', 'ann_et', 'ann_etof', 'ann_eto']
+
+
+def raw_path(*parts):
+    return os.path.join(store.RAW_DATA_DIR, *parts)
+
+
+def read_et(site):
+    return pd.read_csv(raw_path('ucrb_riparain_et', site + '_EEMETRIC_monthly_et_etof.csv'))
+
+
+# Compares two sequences of numbers and adds a message to 'failures' if they differ.
+def compare(failures, label, expected, actual):
+    expected = np.asarray(expected, dtype=float)
+    actual = np.asarray(actual, dtype=float)
+    if expected.shape != actual.shape:
+        failures.append(label + ': shape ' + str(actual.shape) + ' instead of ' + str(expected.shape))
+    elif not np.allclose(expected, actual, rtol=RTOL, atol=ATOL, equal_nan=True):
+        worst = np.nanmax(np.abs(expected - actual))
+        failures.append(label + ': differs by up to ' + str(worst))
+
+
+def check_box_stats(sites, failures):
+    df_et = store.load_sites('et_monthly', sites)
+    for var in ['ET_MEAN', 'EToF_MEAN']:
+        df_stats = boxplots.box_stats(df_et, var, ['station_id', 'month'])
+        for site in sites:
+            df = read_et(site)
+            df['month'] = df['END_DATE'].apply(lambda x: int(x[5:7]))
+            for month, df_month in df.groupby('month'):
+                expected = cbook.boxplot_stats(df_month[var].to_numpy())[0]
+                row = df_stats.loc[(site, month)]
+                label = 'task 1 ' + var + ' ' + site + ' ' + str(month)
+                compare(failures, label, [expected[key] for key in ['med', 'q1', 'q3', 'whislo', 'whishi', 'mean']],
+                        [row[key] for key in ['med', 'q1', 'q3', 'whislo', 'whishi', 'mean']])
+                compare(failures, label + ' fliers', sorted(expected['fliers']), sorted(row['fliers']))
+
+
+def check_monthly_rates(sites, failures):
+    df_stats = aggregate.monthly_stats(store.load_sites('et_monthly', sites), ['ET_MEAN', 'EToF_MEAN'])
+    for site in sites:
+        df = read_et(site)
+        df['Month'] = df['END_DATE'].apply(lambda x: int(x[5:7]))
+        for month in range(1, 13):
+            df_month = df[df['Month'] == month]
+            for var in ['ET_MEAN', 'EToF_MEAN']:
+                values = list(df_month[var])
+                compare(failures, 'task 2 ' + var + ' ' + site + ' ' + str(month),
+                        [statistics.mean(values), statistics.stdev(values)],
+                        [df_stats.loc[(site, month), (var, 'mean')], df_stats.loc[(site, month), (var, 'std')]])
+
+
+def original_flow_et_join(site):
+    df_fl = pd.read_csv(raw_path('flow', site + '_monthly_summary.csv'))
+    df_et = read_et(site)
+    df_et['END_DATE'] = df_et['END_DATE'].apply(lambda x: x[0:7])
+    df_et.rename({'END_DATE': 'date'}, axis=1, inplace=True)
+    df_data = df_et.merge(df_fl, on='date', how='left')
+    df_data['month'] = df_data['month'].apply(lambda x: months.MONTH_NAMES[x - 1])
+    return df_data
+
+
+def check_flow_et(sites, failures):
+    joined = {site: datasets._join_flow_et(site) for site in sites}
+    df_all = pd.concat(joined.values(), ignore_index=True)
+    df_site_stats = stats.correlation_stats(df_all, CFS_VARS, 'EToF_MEAN', by=['station_id'])
+    df_monthly_stats = stats.correlation_stats(df_all, CFS_VARS, 'EToF_MEAN', by=['station_id', 'month'])
+    for site in sites:
+        df_data = original_flow_et_join(site)
+        compare(failures, 'task 3 join ' + site, df_data[['EToF_MEAN'] + CFS_VARS],
+                joined[site][['EToF_MEAN'] + CFS_VARS])
+        if list(df_data['month']) != list(joined[site]['month'].astype(str)):
+            failures.append('task 3 join ' + site + ': months differ')
+
+        for var in CFS_VARS:
+            groups = [((site, var), df_site_stats, df_data)]
+            groups += [((site, month, var), df_monthly_stats, df_data[df_data['month'] == month])
+                       for month in months.MONTH_NAMES]
+            for key, df_stats, df in groups:
+                slope, intercept = np.polyfit(df[var], df['EToF_MEAN'], 1)
+                r, r_p = sp_stats.pearsonr(df['EToF_MEAN'], df[var])
+                tau, tau_p = sp_stats.kendalltau(df['EToF_MEAN'], df[var])
+                compare(failures, 'task 3 stats ' + ' '.join(key), [slope, intercept, r, r_p, tau, tau_p, len(df)],
+                        df_stats.loc[key, stats.STAT_COLUMNS])
+
+
+def check_growing_season_flow(sites, failures):
+    paths = {site: raw_path('flow', site + '_daily.csv') for site in sites}
+    df_means = aggregate.stream_season_means(paths)
+    for site in sites:
+        df_flow = pd.read_csv(paths[site])
+        df_flow = df_flow[df_flow['month'].isin([4, 5, 6, 7, 8, 9])]
+        expected = df_flow.groupby('year')['discharge_cfs'].mean()
+        actual = df_means.loc[site, 'discharge_cfs']
+        compare(failures, 'task 4 ' + site, expected.to_numpy(), actual.reindex(expected.index).to_numpy())
+
+
+def check_matrices(failures):
+    et_df = pd.read_excel(raw_path('ucrc_riparian_means.xlsx'))
+    pr_df = pd.read_excel(raw_path('ucrc_cda_pr_means.xlsx'))
+    joined_df = pd.merge(pr_df, et_df, how='left', left_on=['station_id', 'site_name', 'year'],
+                         right_on=['station_id', 'site_name', 'year'])
+    matrices_ = matrices.correlation_matrices(stations.with_codes(joined_df), MATRIX_VARS)
+
+    groups = [(stations.station(station_id)['station_id'], df) for station_id, df in joined_df.groupby('station_id')]
+    groups.append((matrices.POOLED, joined_df))
+    for site, df in groups:
+        for method in matrices.METHODS:
+            compare(failures, 'task 7 ' + method + ' ' + site, df[MATRIX_VARS].corr(method=method),
+                    matrices.site_matrix(matrices_, site, method))
+        p_values = [[sp_stats.kendalltau(df[x], df[y])[1] for y in MATRIX_VARS] for x in MATRIX_VARS]
+        compare(failures, 'task 7 kendall_p ' + site, p_values, matrices.site_matrix(matrices_, site, 'kendall_p'))
+
+
+def main():
+    sites = stations.discover_sites('et_monthly', 'flow_monthly')
+    failures = []
+    checks = [('task 1 box stats', lambda: check_box_stats(sites, failures)),
+              ('task 2 monthly rates', lambda: check_monthly_rates(sites, failures)),
+              ('task 3 join and stats', lambda: check_flow_et(sites, failures)),
+              ('task 4 growing season flow', lambda: check_growing_season_flow(sites, failures)),
+              ('task 7 correlation matrices', lambda: check_matrices(failures))]
+    for name, check in checks:
+        before = len(failures)
+        check()
+        print(name + ': ' + ('OK' if len(failures) == before else str(len(failures) - before) + ' differences'))
+
+    for failure in failures[:50]:
+        print('  ' + failure)
+    if failures:
+        exit(1)
+
+
+if __name__ == '__main__':
+    main()
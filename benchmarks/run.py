@@ -0,0 +1,75 @@
+# Benchmarks the pipeline stages at several data sizes.
+# For every scale (stations x years) synthetic raw data is written with 'synthetic.py' into a scratch
+# folder, and 'stages.py' times the stages on it in a process of its own. The timings of all scales
+# are written to '<out>/benchmark.json' and '<out>/benchmark.csv' (one row per scale and stage).
+#
+# Usage: python benchmarks/run.py --scales 6x12 28x20 100x40 --out /tmp/ucrb_bench
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import pandas as pd
+
+import synthetic
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SCALES = ['6x12', '28x20', '100x40']
+
+
+def parse_scale(scale):
+    stations, years = scale.lower().split('x')
+    return int(stations), int(years)
+
+
+# Generates the data of one scale and times the stages on it. Returns the parsed output of 'stages.py'.
+def run_scale(scale, work_dir, resamples, seed):
+    stations, years = parse_scale(scale)
+    scale_dir = os.path.join(work_dir, scale)
+    raw_dir = os.path.join(scale_dir, 'raw_data')
+    synthetic.generate(raw_dir, stations, years, seed)
+
+    env = dict(os.environ, UCRB_RAW_DATA=raw_dir, UCRB_STORE=os.path.join(scale_dir, 'data_store'),
+               MPLBACKEND='Agg')
+    command = [sys.executable, os.path.join(BENCHMARKS_DIR, 'stages.py'), '--out', os.path.join(scale_dir, 'out'),
+               '--resamples', str(resamples)]
+    completed = subprocess.run(command, env=env, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError('stages.py failed for ' + scale + ':\n' + completed.stderr)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time the pipeline stages on synthetic data of several sizes.')
+    parser.add_argument('--scales', nargs='+', default=DEFAULT_SCALES, help='stations x years, e.g. 28x20')
+    parser.add_argument('--out', default='.', help='folder for benchmark.json and benchmark.csv')
+    parser.add_argument('--work-dir', default=None, help='scratch folder for the data (a temporary one if not set)')
+    parser.add_argument('--resamples', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    results = {}
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        work_dir = args.work_dir or tmp_dir
+        for scale in args.scales:
+            result = run_scale(scale, work_dir, args.resamples, args.seed)
+            results[scale] = result
+            for stage, timing in result['stages'].items():
+                rows.append(dict({'scale': scale, 'stations': result['stations'], 'daily_rows': result['daily_rows'],
+                                  'stage': stage}, **timing))
+            total = sum(timing['seconds'] for timing in result['stages'].values())
+            print(scale + ': ' + ', '.join(stage + ' ' + str(timing['seconds']) + 's'
+                                           for stage, timing in result['stages'].items())
+                  + ' (total ' + str(round(total, 2)) + 's)')
+
+    os.makedirs(args.out, exist_ok=True)
+    with open(os.path.join(args.out, 'benchmark.json'), 'w') as f:
+        json.dump(results, f, indent=2)
+    pd.DataFrame(rows).to_csv(os.path.join(args.out, 'benchmark.csv'), index=False)
+
+
+if __name__ == '__main__':
+    main()
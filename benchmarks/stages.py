@@ -0,0 +1,125 @@
+# Times every stage of the pipelines on one raw data folder:
+#   load       raw files --> store (ingest) and store --> DataFrames
+#   join       monthly flow + ET (task 3), growing season + precipitation (tasks 6 and 7)
+#   aggregate  growing season mean flow (task 4), monthly ET stats (task 2), box stats (task 1)
+#   stats      regression/correlation stats (task 3), correlation matrices and resampling (task 7)
+#   render     Bokeh grid of scatter plots (task 3) and matplotlib box plots (task 1)
+#   export     workbook, Parquet and CSV of the monthly stat tables of tasks 2 and 3 (see 'ucrb/export.py')
+#
+# 'ucrb/store.py' reads UCRB_RAW_DATA and UCRB_STORE when it is imported, so 'run.py' starts this
+# script in a process of its own for every data folder. It can also be run by hand:
+#   UCRB_RAW_DATA=/tmp/raw UCRB_STORE=/tmp/store python benchmarks/stages.py --out /tmp/bench_out
+# The stages are recorded with 'ucrb/instrument.py' and printed as JSON:
+# {stage: {'seconds': ..., 'cpu_seconds': ..., 'peak_rss_mb': ..., 'rows': ...}}.
+import argparse
+import json
+import os
+import sys
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import pandas as pd
+from bokeh.plotting import figure
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from ucrb import aggregate, boxplots, datasets, export, instrument, layout, matrices, resample, stations, stats, store
+
+CFS_VARS = ['median_cfs', 'Q25_cfs']
+MATRIX_VARS = ['gs_et', 'gs_etof', 'gs_eto', 'ann_et', 'ann_etof', 'ann_eto', 'mean_gs_flow', 'gs_pr', 'ann_pr',
+               'wy_pr']
+
+
+# Runs func() as 'stage' and puts its times, memory and the number of rows it returns into 'timings'.
+def timed(timings, stage, func):
+    with instrument.stage(stage) as record:
+        result = func()
+        record['rows'] = sum(len(df) for df in result) if isinstance(result, tuple) else len(result)
+    timings[stage] = {'seconds': record['wall_s'], 'cpu_seconds': record['cpu_s'],
+                      'peak_rss_mb': record['peak_rss_mb'], 'rows': record['rows']}
+    return result
+
+
+def load(sites):
+    store.ingest(force=True)
+    df_daily = store.load_sites('flow_daily', sites, columns=['station_id', 'year', 'month', 'discharge_cfs'])
+    df_et = store.load_sites('et_monthly', sites)
+    return df_daily, df_et
+
+
+def join(sites):
+    df_flow_et = pd.concat([datasets._join_flow_et(site) for site in sites], ignore_index=True)
+    return df_flow_et, datasets._join_growing_season_pr()
+
+
+def aggregate_stage(sites, df_daily, df_et):
+    paths = {site: store.table_paths('flow_daily', site)[0] for site in sites}
+    df_season = aggregate.stream_season_means(paths)
+    df_et_stats = aggregate.monthly_stats(df_et, ['ET_MEAN', 'EToF_MEAN'])
+    df_boxes = boxplots.box_stats(df_daily, 'discharge_cfs', ['station_id', 'month'])
+    return df_season, df_et_stats, df_boxes
+
+
+def stats_stage(df_flow_et, df_gs_pr, resamples):
+    df_stats = stats.correlation_stats(df_flow_et, CFS_VARS, 'EToF_MEAN', by=['station_id', 'month'])
+    matrices_ = matrices.correlation_matrices(df_gs_pr, MATRIX_VARS)
+    df_resampled = resample.resample_stats(df_flow_et, CFS_VARS, 'EToF_MEAN', by=['station_id', 'month'],
+                                           resamples=resamples, workers=1)
+    return df_stats, pd.DataFrame({'n': matrices_['n'].reshape(-1)}), df_resampled
+
+
+def render(df_flow_et, df_boxes, out_dir):
+    figs = []
+    for site, df_site in df_flow_et.groupby('station_id', observed=True):
+        p = figure(title=str(site), width=350, height=350)
+        p.scatter(df_site['median_cfs'].to_numpy(), df_site['EToF_MEAN'].to_numpy())
+        figs.append(p)
+    layout.save_grid(figs, os.path.join(out_dir, 'scatter_grid.html'))
+
+    sites = df_boxes.index.get_level_values('station_id').unique()
+    fig, axes = plt.subplots(len(sites), 1, figsize=(10, 3 * len(sites)), squeeze=False)
+    for ax, site in zip(axes[:, 0], sites):
+        df_site = df_boxes.xs(site, level='station_id')
+        boxplots.draw(ax, df_site, [str(month) for month in df_site.index])
+    fig.savefig(os.path.join(out_dir, 'box_plots.png'))
+    plt.close(fig)
+    return df_flow_et
+
+
+def export_stage(sites, df_et_stats, df_stats, out_dir):
+    site_names = stations.site_names()
+    sheets = {}
+    for var in ['ET_MEAN', 'EToF_MEAN']:
+        df_table = df_et_stats[var].stack().unstack('month').reset_index()
+        sheets[export.sheet_name(var)] = (var, df_table)
+    tables = export.monthly_tables(df_stats, sites, CFS_VARS, ['pearson_r', 'pearson_p', 'kendall_tau', 'kendall_p'],
+                                   site_names)
+    for (var, stat), df_table in tables.items():
+        sheets[export.sheet_name(var, stat)] = (stat, df_table)
+    export.write_tables(os.path.join(out_dir, 'monthly_stats'), sheets, export.FORMATS)
+    return export.stack_tables(sheets)
+
+
+def run(out_dir, resamples):
+    os.makedirs(out_dir, exist_ok=True)
+    sites = stations.discover_sites('flow_daily', 'flow_monthly', 'et_monthly')
+    timings = {}
+    df_daily, df_et = timed(timings, 'load', lambda: load(sites))
+    df_flow_et, df_gs_pr = timed(timings, 'join', lambda: join(sites))
+    df_season, df_et_stats, df_boxes = timed(timings, 'aggregate', lambda: aggregate_stage(sites, df_daily, df_et))
+    df_stats, _, _ = timed(timings, 'stats', lambda: stats_stage(df_flow_et, df_gs_pr, resamples))
+    timed(timings, 'render', lambda: render(df_flow_et, df_boxes, out_dir))
+    timed(timings, 'export', lambda: export_stage(sites, df_et_stats, df_stats, out_dir))
+    return {'stations': len(sites), 'daily_rows': len(df_daily), 'stages': timings}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time every pipeline stage on the data in UCRB_RAW_DATA.')
+    parser.add_argument('--out', required=True, help='folder for the plots and workbook made while timing')
+    parser.add_argument('--resamples', type=int, default=200)
+    args = parser.parse_args()
+    print(json.dumps(run(args.out, args.resamples)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+# Synthetic raw data for the benchmarks.
+# Writes a 'raw_data' folder with the same files, columns and formats as the real one, for any number
+# of stations and years:
+#   metadata.csv, flow/<site>_daily.csv, flow/<site>_monthly_summary.csv,
+#   ucrb_riparain_et/<site>_EEMETRIC_monthly_et_etof.csv, ucrc_riparian_means.xlsx,
+#   ucrc_cda_pr_means.xlsx and growing_season_et_and_flow.csv
+# Like the real files, the station ids in the xlsx and growing season files lose their leading '0'.
+#
+# Usage: python benchmarks/synthetic.py <out_dir> --stations 28 --years 20
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from ucrb import aggregate, periods
+
+LAST_YEAR = 2021
+
+
+def station_ids(stations):
+    return ['09' + str(100000 + 1000 * i).zfill(6) for i in range(stations)]
+
+
+def site_name(i):
+    return 'SYNTHETIC RIVER ' + str(i + 1) + ' NEAR NOWHERE, UT'
+
+
+def write_metadata(raw_dir, sites):
+    df = pd.DataFrame({'station_id': sites,
+                       'site_name': [site_name(i) for i in range(len(sites))],
+                       'latitude': np.linspace(37, 42, len(sites)),
+                       'longitude': np.linspace(-111, -106, len(sites)),
+                       'data_available': 'YES'})
+    df.to_csv(os.path.join(raw_dir, 'metadata.csv'))
+
+
+# Daily discharge with a snow melt peak in early summer and some noise.
+def daily_flow(rng, years):
+    dates = pd.date_range(str(LAST_YEAR - years + 1) + '-01-01', str(LAST_YEAR) + '-12-31', freq='D')
+    day_of_year = dates.dayofyear.to_numpy()
+    base = rng.uniform(50, 500)
+    peak = rng.uniform(500, 5000) * np.exp(-((day_of_year - 160) / 30.0) ** 2)
+    discharge = np.round(base + peak * rng.lognormal(0, 0.3, len(dates)), 1)
+    return pd.DataFrame({'date': dates.strftime('%Y-%m-%d'), 'year': dates.year,
+                         'month': dates.strftime('%m'), 'day': dates.strftime('%d'), 'discharge_cfs': discharge})
+
+
+# Monthly EEMETRIC ET, EToF and ETo of every month.
+def et_monthly(rng, years):
+    starts = pd.date_range(str(LAST_YEAR - years + 1) + '-01-01', periods=12 * years, freq='MS')
+    ends = starts + pd.offsets.MonthEnd(0)
+    season = np.sin(np.pi * (starts.month.to_numpy() - 1) / 11)
+    eto = 20 + 180 * season * rng.uniform(0.9, 1.1, len(starts))
+    etof = np.clip(0.1 + 0.6 * season + rng.normal(0, 0.05, len(starts)), 0.01, 1.2)
+    return pd.DataFrame({'START_DATE': starts.strftime('%Y-%m-%d'), 'END_DATE': ends.strftime('%Y-%m-%d'),
+                         'ET_MEAN': eto * etof, 'EToF_MEAN': etof, 'ETo_MEAN': eto,
+                         'PIXEL_COUNT': rng.integers(50000, 400000, len(starts))})
+
+
+# The yearly growing season (Apr - Sept) and annual ET sums of one station, from its monthly ET.
+def yearly_et(df_et):
+    df = df_et.assign(year=pd.to_datetime(df_et['END_DATE']).dt.year, month=pd.to_datetime(df_et['END_DATE']).dt.month)
+    growing = df[df['month'].isin(aggregate.GROWING_SEASON_MONTHS)].groupby('year')
+    annual = df.groupby('year')
+    df_yearly = pd.DataFrame({'gs_et': growing['ET_MEAN'].sum(), 'gs_eto': growing['ETo_MEAN'].sum(),
+                              'ann_et': annual['ET_MEAN'].sum(), 'ann_eto': annual['ETo_MEAN'].sum()})
+    df_yearly['gs_etof'] = df_yearly['gs_et'] / df_yearly['gs_eto']
+    df_yearly['ann_etof'] = df_yearly['ann_et'] / df_yearly['ann_eto']
+    return df_yearly[['gs_et', 'gs_etof', 'gs_eto', 'ann_et', 'ann_etof', 'ann_eto']].reset_index()
+
+
+def yearly_pr(rng, years):
+    ann = rng.uniform(200, 700, years)
+    return pd.DataFrame({'year': np.arange(LAST_YEAR - years + 1, LAST_YEAR + 1),
+                         'gs_pr': ann * rng.uniform(0.3, 0.5, years), 'ann_pr': ann,
+                         'wy_pr': ann * rng.uniform(0.8, 1.1, years)})
+
+
+# Writes every raw file for 'stations' stations with 'years' years of data into 'raw_dir'.
+# Returns the station ids.
+def generate(raw_dir, stations, years, seed=0):
+    rng = np.random.default_rng(seed)
+    sites = station_ids(stations)
+    os.makedirs(os.path.join(raw_dir, 'flow'), exist_ok=True)
+    os.makedirs(os.path.join(raw_dir, 'ucrb_riparain_et'), exist_ok=True)
+    write_metadata(raw_dir, sites)
+
+    riparian, precipitation, growing_flow = [], [], []
+    for i, site in enumerate(sites):
+        df_daily = daily_flow(rng, years)
+        daily_path = os.path.join(raw_dir, 'flow', site + '_daily.csv')
+        df_daily.to_csv(daily_path)
+        df_typed = df_daily.assign(year=df_daily['year'].astype('int16'), month=df_daily['month'].astype('int8'))
+        periods.monthly_summary(df_typed).to_csv(os.path.join(raw_dir, 'flow', site + '_monthly_summary.csv'),
+                                                 index=False)
+
+        df_et = et_monthly(rng, years)
+        df_et.to_csv(os.path.join(raw_dir, 'ucrb_riparain_et', site + '_EEMETRIC_monthly_et_etof.csv'), index=False)
+
+        keys = {'station_id': int(site), 'site_name': site_name(i)}
+        riparian.append(yearly_et(df_et).assign(**keys))
+        precipitation.append(yearly_pr(rng, years).assign(**keys))
+        df_flow = aggregate.stream_season_mean(daily_path, aggregate.GROWING_SEASON_MONTHS)
+        growing_flow.append(pd.DataFrame({'station_id': int(site), 'year': df_flow.index.astype(int),
+                                          'mean_gs_flow': df_flow.to_numpy()}))
+
+    columns = ['station_id', 'site_name', 'year']
+    df_riparian = pd.concat(riparian, ignore_index=True).sort_values(['year', 'station_id'], kind='stable')
+    df_riparian = df_riparian[columns + ['gs_et', 'gs_etof', 'gs_eto', 'ann_et', 'ann_etof', 'ann_eto']]
+    df_riparian.to_excel(os.path.join(raw_dir, 'ucrc_riparian_means.xlsx'), index=False)
+
+    df_pr = pd.concat(precipitation, ignore_index=True).sort_values(['year', 'station_id'], kind='stable')
+    df_pr[columns + ['gs_pr', 'ann_pr', 'wy_pr']].to_excel(os.path.join(raw_dir, 'ucrc_cda_pr_means.xlsx'),
+                                                          index=False)
+
+    df_growing = df_riparian.merge(pd.concat(growing_flow), on=['station_id', 'year'], how='left')
+    df_growing.reset_index(drop=True).to_csv(os.path.join(raw_dir, 'growing_season_et_and_flow.csv'))
+    return sites
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write synthetic raw data in the layout of raw_data.')
+    parser.add_argument('out_dir', help="folder to write the files into (the 'raw_data' folder)")
+    parser.add_argument('--stations', type=int, default=6)
+    parser.add_argument('--years', type=int, default=12)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    sites = generate(args.out_dir, args.stations, args.years, args.seed)
+    print('Wrote ' + str(len(sites)) + ' stations x ' + str(args.years) + ' years into ' + args.out_dir)
+
+
+if __name__ == '__main__':
+    main()
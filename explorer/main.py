@@ -0,0 +1,135 @@
+# Interactive explorer for the datasets behind tasks 3 - 6.
+# Run it with Bokeh's server from the repository root:
+#
+#     bokeh serve --show explorer
+#
+# The joined datasets are loaded once per server process and kept in memory (see 'ucrb/datasets.py'),
+# so every browser session shares them. Changing a widget only filters the data already in memory and
+# recomputes the regression and correlation stats of the one selection that is shown.
+import os
+import sys
+import pandas as pd
+from bokeh.io import curdoc
+from bokeh.layouts import column, row
+from bokeh.models import ColumnDataSource, Div, RangeSlider, Select
+from bokeh.models.tools import HoverTool
+from bokeh.plotting import figure
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from ucrb import datasets, plotting, stations, stats
+
+ALL_SITES = 'all'
+
+# Dataset name -> (x variables, y variables)
+# The monthly dataset is task 3's join of monthly ET and flow; the yearly one is the growing season
+# table of tasks 4 - 6 joined with the precipitation means.
+VARIABLES = {
+    'Monthly ET vs. flow': (['median_cfs', 'Q25_cfs', 'mean_cfs', 'min_cfs', 'max_cfs'],
+                            ['EToF_MEAN', 'ET_MEAN', 'ETo_MEAN']),
+    'Growing season (yearly)': (['mean_gs_flow', 'ann_pr', 'wy_pr', 'gs_pr'],
+                                ['gs_etof', 'gs_et', 'mean_gs_flow', 'ann_etof', 'ann_et']),
+}
+
+
+# Both datasets for every site that has monthly flow and ET, stacked into one frame each.
+def load_datasets():
+    site_names = stations.site_names()
+    sites = stations.discover_sites('flow_monthly', 'et_monthly')
+
+    df_monthly = pd.concat([datasets.monthly_flow_et(site) for site in sites], ignore_index=True)
+    df_monthly['site_name'] = df_monthly['station_id'].map(site_names)
+    df_monthly['month_number'] = df_monthly['month'].cat.codes + 1
+    df_monthly['month'] = df_monthly['month'].astype(str)
+
+    df_yearly = datasets.growing_season_pr()
+    return sites, site_names, {'Monthly ET vs. flow': df_monthly, 'Growing season (yearly)': df_yearly}
+
+
+def stats_text(row_stats):
+    if row_stats is None:
+        return 'Not enough data'
+    return '<br>'.join(['Slope: ' + '{:.4g}'.format(row_stats['slope']),
+                        'Intercept: ' + str(round(row_stats['intercept'], 3)),
+                        'Pearson r: ' + str(round(row_stats['pearson_r'], 3)),
+                        'Pearson P-Value: ' + str(round(row_stats['pearson_p'], 3)),
+                        'Kendall Tau: ' + str(round(row_stats['kendall_tau'], 3)),
+                        'Kendall P-Value: ' + str(round(row_stats['kendall_p'], 3)),
+                        'n: ' + str(int(row_stats['n']))])
+
+
+sites, site_names, frames = load_datasets()
+
+dataset_select = Select(title='Dataset', value='Monthly ET vs. flow', options=list(VARIABLES))
+site_select = Select(title='Site', value=sites[0],
+                     options=[(ALL_SITES, 'All sites')] + [(site, site + ' - ' + site_names[site]) for site in sites])
+month_slider = RangeSlider(title='Months (Jan = 1)', start=1, end=12, value=(1, 12), step=1)
+x_select = Select(title='x', value='median_cfs', options=VARIABLES['Monthly ET vs. flow'][0])
+y_select = Select(title='y', value='EToF_MEAN', options=VARIABLES['Monthly ET vs. flow'][1])
+stats_div = Div(width=250)
+
+points = ColumnDataSource({'x': [], 'y': [], 'year': [], 'label': []})
+line = ColumnDataSource({'x': [], 'y': []})
+
+p = figure(width=900, height=700)
+p.xgrid.grid_line_color = None
+p.ygrid.grid_line_color = None
+circle = p.scatter(x='x', y='y', source=points, color='black', fill_color="#add8e6", size=8)
+p.line(x='x', y='y', source=line, color='black')
+p.add_tools(HoverTool(renderers=[circle], tooltips=[('Year', '@year'), ('', '@label'), ('x', '@x'), ('y', '@y')]))
+
+
+# Filters the data in memory to the current selection, recomputes its stats and redraws the plot.
+def update():
+    dataset = dataset_select.value
+    x_var, y_var = x_select.value, y_select.value
+    df = frames[dataset]
+
+    # While the dataset is being switched the x and y selectors briefly hold the old variables.
+    if x_var not in df.columns or y_var not in df.columns:
+        return
+
+    if site_select.value != ALL_SITES:
+        df = df[df['station_id'] == site_select.value]
+    if dataset == 'Monthly ET vs. flow':
+        first, last = month_slider.value
+        df = df[df['month_number'].between(int(first), int(last))]
+        labels = df['site_name'] + ' ' + df['month']
+    else:
+        labels = df['site_name']
+
+    df_pairs = pd.DataFrame({'x': df[x_var], 'y': df[y_var], 'year': df['year'], 'label': labels}).dropna()
+    points.data = {column_name: df_pairs[column_name].to_numpy() for column_name in df_pairs.columns}
+
+    row_stats = None
+    if len(df_pairs) > 1:
+        row_stats = stats.correlation_stats(df_pairs, 'x', 'y', by=[]).iloc[0]
+    if row_stats is not None:
+        x_ends, y_ends = plotting.line_points(df_pairs['x'], row_stats['slope'], row_stats['intercept'])
+        line.data = {'x': x_ends, 'y': y_ends}
+    else:
+        line.data = {'x': [], 'y': []}
+    stats_div.text = stats_text(row_stats)
+
+    where = 'All sites' if site_select.value == ALL_SITES else site_names[site_select.value]
+    p.title.text = where + ': ' + y_var + ' vs. ' + x_var
+    p.xaxis.axis_label = x_var
+    p.yaxis.axis_label = y_var
+
+
+# Switching the dataset changes which variables can be picked.
+def change_dataset(attr, old, new):
+    x_vars, y_vars = VARIABLES[new]
+    month_slider.disabled = new != 'Monthly ET vs. flow'
+    x_select.options, y_select.options = x_vars, y_vars
+    x_select.value, y_select.value = x_vars[0], y_vars[0]
+    update()
+
+
+dataset_select.on_change('value', change_dataset)
+for widget in [site_select, x_select, y_select]:
+    widget.on_change('value', lambda attr, old, new: update())
+month_slider.on_change('value_throttled', lambda attr, old, new: update())
+
+update()
+curdoc().add_root(row(column(dataset_select, site_select, month_slider, x_select, y_select, stats_div), p))
+curdoc().title = 'UCRB explorer'
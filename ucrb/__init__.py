@@ -0,0 +1,2 @@
+# Shared code of the tasks in this repository. The tasks themselves are in 'ucrb/tasks' and are run
+# with the 'ucrb' command (see 'ucrb/cli.py') or the scripts in the task folders.
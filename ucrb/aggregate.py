@@ -0,0 +1,95 @@
+# Aggregation helpers shared by the task scripts.
+import pandas as pd
+
+
+def _is_number(text):
+    return text.replace('.', '', 1).isdigit()
+
+
+# Returns the quantile (0 - 1) for statistic names like 'q25' or 'Q25', or None for anything else.
+# Exceedance percentiles are quantiles too: 'exc10', the value exceeded 10% of the time, is 'q90'.
+def _quantile_of(stat):
+    if len(stat) > 1 and stat[0] in 'qQ' and _is_number(stat[1:]):
+        return float(stat[1:]) / 100
+    if len(stat) > 3 and stat[:3] == 'exc' and _is_number(stat[3:]):
+        return 1 - float(stat[3:]) / 100
+    return None
+
+
+# Groups 'df' by the 'by' columns and computes every statistic in 'stats' for every column in
+# 'value_cols' in a single groupby pass.
+# A statistic is either a pandas aggregation name ('mean', 'std', 'median', 'count', 'min', 'max', ...)
+# or a quantile written as 'q' followed by the percentile ('q25', 'q75', 'q2.5', ...)
+# or an exceedance percentile written as 'exc' followed by the percent of time exceeded ('exc10', ...).
+# 'std' is the sample standard deviation, the same as statistics.stdev.
+# The result is indexed by the 'by' columns and has (value column, statistic) columns.
+def group_stats(df, value_cols, by, stats=('mean', 'std')):
+    value_cols = list(value_cols)
+    grouped = df.groupby(list(by), observed=True, sort=True)[value_cols]
+
+    plain_stats = [stat for stat in stats if _quantile_of(stat) is None]
+    quantile_stats = [stat for stat in stats if _quantile_of(stat) is not None]
+
+    frames = []
+    if plain_stats:
+        frames.append(grouped.agg(plain_stats))
+    if quantile_stats:
+        # All quantiles are computed together; the result has the quantile as an extra index level.
+        # Two names can mean the same quantile ('q25' and 'exc75'), so it is only computed once.
+        quantiles = sorted(set(_quantile_of(stat) for stat in quantile_stats))
+        df_quantiles = grouped.quantile(quantiles).unstack(-1)
+        frames.append(pd.DataFrame({(col, stat): df_quantiles[(col, _quantile_of(stat))]
+                                    for col in value_cols for stat in quantile_stats}))
+
+    df_stats = pd.concat(frames, axis=1)
+    return df_stats[[(col, stat) for col in value_cols for stat in stats]]
+
+
+# Statistics of 'value_cols' for every site and month.
+# 'df' must hold a 'station_id' and a month column (named by 'month_col').
+def monthly_stats(df, value_cols, stats=('mean', 'std'), month_col='month'):
+    return group_stats(df, value_cols, ['station_id', month_col], stats)
+
+
+#######################################################
+# Streaming aggregation of daily files
+
+# Months of the growing season used by tasks 4, 5 and 6 (April - September).
+GROWING_SEASON_MONTHS = (4, 5, 6, 7, 8, 9)
+
+# Number of rows read from a daily file at a time.
+CHUNK_ROWS = 50000
+
+
+# Mean of 'value_col' for every year of a daily csv file, using only the days in 'months'.
+# The file is read 'chunksize' rows at a time and only running sums and counts per year are kept,
+# so the memory used does not grow with the length of the record.
+# Missing values are skipped like pandas' mean does; a year with no values gets NaN.
+# Returns a Series indexed by year.
+def stream_season_mean(path, months=GROWING_SEASON_MONTHS, value_col='discharge_cfs', chunksize=CHUNK_ROWS):
+    sums = None
+    counts = None
+    reader = pd.read_csv(path, usecols=['year', 'month', value_col], chunksize=chunksize,
+                         dtype={'year': 'int16', 'month': 'int8', value_col: 'float64'})
+    for chunk in reader:
+        chunk = chunk[chunk['month'].isin(months)]
+        grouped = chunk.groupby('year', sort=False)[value_col]
+        if sums is None:
+            sums, counts = grouped.sum(), grouped.count()
+        else:
+            sums = sums.add(grouped.sum(), fill_value=0)
+            counts = counts.add(grouped.count(), fill_value=0)
+
+    if sums is None:
+        return pd.Series([], index=pd.Index([], dtype='int16', name='year'), name=value_col, dtype='float64')
+    means = (sums / counts.where(counts > 0)).sort_index()
+    means.index = means.index.astype('int16')
+    return means.rename(value_col)
+
+
+# Runs 'stream_season_mean' over several daily files, one after the other.
+# 'paths' maps a key (e.g. a site name) to its file. The result is indexed by (key_name, 'year').
+def stream_season_means(paths, months=GROWING_SEASON_MONTHS, value_col='discharge_cfs',
+                        chunksize=CHUNK_ROWS, key_name='station_id'):
+    means = {key: stream_season_mean(path, months, value_col, chunksize) for key, path in paths.items()}
+    return pd.concat(means, names=[key_name, 'year']).to_frame(value_col)
@@ -0,0 +1,56 @@
+# Box plots drawn from precomputed statistics.
+# Instead of handing every raw value to seaborn/matplotlib and letting them work out the boxes one axis
+# at a time, the quartiles, whiskers and fliers of every group are computed together in a few groupby
+# passes and drawn with matplotlib's Axes.bxp.
+#
+# The statistics follow matplotlib's (and seaborn's) rules: linear quartiles and whiskers at the most
+# extreme values within 1.5 IQR of the box.
+import pandas as pd
+
+WHIS = 1.5
+
+
+# Box statistics of 'value_col' for every group of the 'by' columns.
+# Returns a DataFrame indexed by the 'by' columns with the columns Axes.bxp reads
+# ('med', 'q1', 'q3', 'whislo', 'whishi', 'mean', 'fliers').
+def box_stats(df, value_col, by, whis=WHIS):
+    by = list(by)
+    df = df.loc[df[value_col].notna(), by + [value_col]]
+    grouped = df.groupby(by, observed=True, sort=True)[value_col]
+
+    df_stats = grouped.quantile([0.25, 0.5, 0.75]).unstack(-1)
+    df_stats.columns = ['q1', 'med', 'q3']
+    df_stats['mean'] = grouped.mean()
+    iqr = df_stats['q3'] - df_stats['q1']
+    df_stats['lo_fence'] = df_stats['q1'] - whis * iqr
+    df_stats['hi_fence'] = df_stats['q3'] + whis * iqr
+
+    # Every value next to the fences of its group, to find the whiskers and fliers of all groups at once.
+    df_values = df.join(df_stats[['q1', 'q3', 'lo_fence', 'hi_fence']], on=by)
+    values = df_values[value_col]
+    inside = (values >= df_values['lo_fence']) & (values <= df_values['hi_fence'])
+    df_inside = df_values[inside].groupby(by, observed=True, sort=True)[value_col]
+
+    # Like matplotlib, a whisker never ends inside the box.
+    df_stats['whislo'] = pd.concat([df_inside.min(), df_stats['q1']], axis=1).min(axis=1)
+    df_stats['whishi'] = pd.concat([df_inside.max(), df_stats['q3']], axis=1).max(axis=1)
+
+    df_values = df_values.join(df_stats[['whislo', 'whishi']], on=by)
+    outside = (values < df_values['whislo']) | (values > df_values['whishi'])
+    fliers = df_values[outside].groupby(by, observed=True, sort=True)[value_col].agg(list)
+    df_stats['fliers'] = fliers.reindex(df_stats.index)
+    df_stats['fliers'] = [f if isinstance(f, list) else [] for f in df_stats['fliers']]
+
+    return df_stats[['med', 'q1', 'q3', 'whislo', 'whishi', 'mean', 'fliers']]
+
+
+# Draws one box per row of 'df_stats' (as made by 'box_stats') on 'ax', labelled with 'labels'.
+# 'positions' places the boxes; by default they go at 0, 1, 2, ...
+def draw(ax, df_stats, labels, positions=None, color='#add8e6'):
+    boxes = [dict(row, label=label) for row, label in zip(df_stats.to_dict('records'), labels)]
+    if positions is None:
+        positions = range(len(boxes))
+    return ax.bxp(boxes, positions=list(positions), widths=0.8, patch_artist=True,
+                  boxprops={'facecolor': color}, medianprops={'color': 'black'},
+                  flierprops={'marker': 'd', 'markerfacecolor': 'gray', 'markeredgecolor': 'gray',
+                              'markersize': 5})
@@ -0,0 +1,122 @@
+# Incremental builds: only regenerate outputs whose inputs or code changed.
+# Every output directory gets a manifest ('.ucrb_manifest.json') that records, for each output file,
+# a signature made from the content hashes of the input files and of the code that wrote it.
+# A step is skipped while all of its outputs exist and their recorded signatures still match.
+#
+# Set UCRB_FORCE=1 to rebuild everything regardless of the manifests.
+# The environment variables in OUTPUT_SETTINGS change what the outputs look like, so they are part of
+# every signature.
+#
+# Only call 'record' from the main process; worker processes should just build and return.
+import os
+import json
+import glob
+import hashlib
+
+MANIFEST_NAME = '.ucrb_manifest.json'
+
+# Manifest entry that lists the pages of every paged output (see 'ucrb/layout.py'):
+# name of the first page -> names of all of its pages
+PAGES_KEY = '.pages'
+OUTPUT_SETTINGS = ['UCRB_PAGE_BYTES', 'UCRB_CONFIDENCE_BAND']
+UCRB_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Content hashes are remembered per (path, mtime, size) so each file is read at most once per run.
+_hash_cache = {}
+
+
+def force_rebuild():
+    return os.environ.get('UCRB_FORCE') == '1'
+
+
+# Returns the sha256 of a file's contents, or 'missing' if it does not exist.
+def file_hash(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return 'missing'
+    key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+    if key not in _hash_cache:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        _hash_cache[key] = digest.hexdigest()
+    return _hash_cache[key]
+
+
+# Version of the code that writes an output: the calling module plus everything directly in 'ucrb'.
+def code_version(code_file):
+    paths = [os.path.abspath(code_file)] + sorted(glob.glob(os.path.join(UCRB_DIR, '*.py')))
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(file_hash(path).encode())
+    return digest.hexdigest()
+
+
+# One signature for a set of inputs, the code and any extra settings that change the output.
+def signature(inputs, code_file, extra=None):
+    digest = hashlib.sha256(code_version(code_file).encode())
+    for path in sorted(os.path.abspath(path) for path in inputs):
+        digest.update((path + ':' + file_hash(path)).encode())
+    settings = {name: os.environ.get(name) for name in OUTPUT_SETTINGS}
+    digest.update(json.dumps(settings, sort_keys=True).encode())
+    if extra is not None:
+        digest.update(json.dumps(extra, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def _manifest_path(output):
+    return os.path.join(os.path.dirname(os.path.abspath(output)), MANIFEST_NAME)
+
+
+def _read_manifest(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+# Returns True if every output exists and was last built from the same inputs, code and settings.
+def up_to_date(outputs, inputs, code_file, extra=None):
+    if force_rebuild():
+        return False
+    sig = signature(inputs, code_file, extra)
+    for output in outputs:
+        if not os.path.exists(output):
+            return False
+        if _read_manifest(_manifest_path(output)).get(os.path.basename(output)) != sig:
+            return False
+    return True
+
+
+# The pages of the paged output whose first page is 'path', as they were last recorded (see 'record').
+# Only the first page if the output was never recorded. Check all of them with 'up_to_date', so that a
+# later page that was deleted or is stale gets the output built again.
+def pages(path):
+    names = _read_manifest(_manifest_path(path)).get(PAGES_KEY, {}).get(os.path.basename(path))
+    if not names:
+        return [path]
+    return [os.path.join(os.path.dirname(path), name) for name in names]
+
+
+# Records that 'outputs' were just built from 'inputs' by 'code_file'.
+# If 'paged' is set, 'outputs' are the pages of one paged output (first page first), and the list of
+# pages is recorded as well (see 'pages').
+def record(outputs, inputs, code_file, extra=None, paged=False):
+    sig = signature(inputs, code_file, extra)
+    by_manifest = {}
+    for output in outputs:
+        by_manifest.setdefault(_manifest_path(output), []).append(os.path.basename(output))
+
+    for path, names in by_manifest.items():
+        manifest = _read_manifest(path)
+        for name in names:
+            manifest[name] = sig
+        if paged:
+            manifest.setdefault(PAGES_KEY, {})[names[0]] = names
+        tmp = path + '.' + str(os.getpid()) + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp, path)
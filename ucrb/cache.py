@@ -0,0 +1,70 @@
+# Compute-once cache for derived DataFrames (joins, aggregations, ...).
+# A cached frame is keyed on its name plus the mtime and size of every source file it was built from,
+# so changing a source file rebuilds it automatically. Frames are held in memory for the life of the
+# process and, if 'persist' is set, written to '<data_store>/cache' so that the next run can read
+# them back without repeating the work.
+import os
+import glob
+import hashlib
+import pandas as pd
+
+from ucrb import store
+
+CACHE_DIR = os.path.join(store.STORE_DIR, 'cache')
+
+_memory_cache = {}
+
+
+# Returns a hex digest that changes whenever one of the source files (or 'version') changes.
+# Missing source files are part of the signature too, so creating one also invalidates the cache.
+def source_signature(sources, version=1):
+    digest = hashlib.sha1(str(version).encode())
+    for path in sources:
+        try:
+            st = os.stat(path)
+            digest.update((path + ':' + str(st.st_mtime_ns) + ':' + str(st.st_size)).encode())
+        except FileNotFoundError:
+            digest.update((path + ':missing').encode())
+    return digest.hexdigest()[:16]
+
+
+def _disk_path(name, signature):
+    return os.path.join(CACHE_DIR, name + '-' + signature + '.parquet')
+
+
+# Returns the frame built by 'build()' for 'name', building it only if no cached copy matches 'sources'.
+# Bump 'version' whenever the code inside 'build' changes what it returns.
+# The caller gets its own copy, so modifying it does not change the cached frame.
+def cached_frame(name, sources, build, persist=False, version=1):
+    signature = source_signature(sources, version)
+    key = (name, signature)
+
+    if key not in _memory_cache:
+        path = _disk_path(name, signature)
+        if persist and os.path.exists(path):
+            df = pd.read_parquet(path)
+        else:
+            df = build()
+            if persist:
+                _write(df, name, path)
+        _memory_cache[key] = df
+
+    return _memory_cache[key].copy()
+
+
+# Writes a cached frame to disk and removes the copies left behind by older signatures.
+def _write(df, name, path):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    for old_path in glob.glob(os.path.join(CACHE_DIR, name + '-*.parquet')):
+        try:
+            os.remove(old_path)
+        except FileNotFoundError:
+            pass
+    tmp = path + '.' + str(os.getpid()) + '.tmp'
+    df.to_parquet(tmp)
+    os.replace(tmp, path)
+
+
+# Empties the in-memory cache (the files on disk are left alone).
+def clear():
+    _memory_cache.clear()
@@ -0,0 +1,145 @@
+# The 'ucrb' command (installed with 'pip install .', see 'pyproject.toml', or run as 'python -m ucrb.cli'):
+#   ucrb list                            lists the tasks
+#   ucrb ingest [--force]                converts the raw files into the store up front (see 'ucrb/store.py')
+#   ucrb run TASK [TASK ...] [options]   runs the tasks one after the other in this process ('all' runs every task)
+#
+# Example: ucrb run task3 --sites 09180000,09379500 --vars median_cfs,Q25_cfs --no-site-plots
+#
+# 'ucrb run TASK --help' lists the options of a task. When several tasks run:
+#   - '--sites' and '--formats' go to every task that takes them (see SHARED_OPTIONS in 'ucrb/tasks/__init__.py')
+#   - any other option goes to the one task that takes it; if more than one of the tasks has an option
+#     of that name (e.g. '--vars' of tasks 3 and 7), it has to be given per task, prefixed with the
+#     task name: ucrb run task3 task7 --task3-vars median_cfs --task7-vars gs_pr,gs_et
+#   - an option that none of the tasks takes is an error
+# The tasks share the store files, joins and station registry they load (see 'ucrb/tasks/__init__.py'),
+# so running them together costs less than running their scripts one by one.
+#
+# The run options below are the environment variables of the same names, for this run:
+#   --force         UCRB_FORCE=1 (see 'ucrb/build.py')
+#   --workers       UCRB_WORKERS (see 'ucrb/runner.py')
+#   --report        UCRB_REPORT (see 'ucrb/instrument.py')
+#   --profile       UCRB_PROFILE
+#   --profile-mode  UCRB_PROFILE_MODE
+import argparse
+import os
+
+from ucrb import instrument, store, tasks
+
+# Run option -> environment variable
+RUN_SETTINGS = {
+    'workers': 'UCRB_WORKERS',
+    'report': 'UCRB_REPORT',
+    'profile': 'UCRB_PROFILE',
+    'profile_mode': 'UCRB_PROFILE_MODE',
+}
+
+
+def make_parser():
+    parser = argparse.ArgumentParser(prog='ucrb', description='Upper Colorado River Basin ET and flow tasks.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('list', help='list the tasks')
+
+    ingest_parser = commands.add_parser('ingest', help='convert the raw files into the store')
+    ingest_parser.add_argument('--force', action='store_true', help='convert every file, not only the changed ones')
+
+    # The options of the tasks themselves are parsed by the tasks, so '--help' is left to them too.
+    run_parser = commands.add_parser('run', add_help=False, help="run tasks ('ucrb run TASK --help' for its options)",
+                                     usage='ucrb run TASK [TASK ...] [run options] [task options]')
+    run_parser.add_argument('tasks', nargs='+', metavar='TASK', help='task1 ... task7, or all')
+    run_parser.add_argument('--force', action='store_true', help='make every output again, even if up to date')
+    run_parser.add_argument('--workers', type=int, help='worker processes of the per-site work')
+    run_parser.add_argument('--report', metavar='PATH', help='write the stage report there (.json or .csv)')
+    run_parser.add_argument('--profile', metavar='STAGE', choices=instrument.STAGES,
+                            help='profile every stage of this name')
+    run_parser.add_argument('--profile-mode', choices=instrument.PROFILE_MODES,
+                            help='cprofile (default) or tracemalloc')
+    return parser
+
+
+def list_tasks():
+    for name in tasks.TASKS:
+        print(name + ': ' + tasks.load_task(name).DESCRIPTION + ' (' + tasks.task_dir(name) + ')')
+
+
+def ingest(force):
+    converted = store.ingest(force=force)
+    print('Converted ' + str(len(converted)) + ' files into ' + store.STORE_DIR)
+
+
+# Splits 'argv' into its options, each with the values that follow it:
+# ['--vars', 'a', 'b', '--no-site-plots'] --> [['--vars', 'a', 'b'], ['--no-site-plots']]
+def split_options(argv):
+    groups = []
+    for arg in argv:
+        if not groups or (arg.startswith('-') and not arg[1:2].isdigit()):
+            groups.append([arg])
+        else:
+            groups[-1].append(arg)
+    return groups
+
+
+# Hands every task option to the tasks it is meant for (see the top of this file) and parses the
+# options of every task strictly.
+def parse_task_args(names, argv):
+    options = {name: tasks.task_options(name) for name in names}
+    task_argv = {name: [] for name in names}
+
+    for group in split_options(argv):
+        option = group[0].split('=', 1)[0]
+        targets = [name for name in names if option.startswith('--' + name + '-')]
+        if targets:
+            # '--task7-vars a' --> '--vars a' for task 7 only
+            group = ['--' + group[0][len('--' + targets[0] + '-'):]] + group[1:]
+        elif len(names) == 1:
+            targets = names
+        else:
+            targets = [name for name in names if option in options[name]]
+            if not targets:
+                print('ERROR: NO TASK TAKES: ' + option)
+                exit(2)
+            if len(targets) > 1 and option not in tasks.SHARED_OPTIONS:
+                print('ERROR: ' + option + ' IS AN OPTION OF ' + ', '.join(targets) + ', GIVE IT PER TASK: ' +
+                      ' '.join('--' + name + '-' + option[2:] for name in targets))
+                exit(2)
+        for name in targets:
+            task_argv[name] += group
+
+    return {name: tasks.make_parser(name, 'ucrb run ' + name).parse_args(task_argv[name]) for name in names}
+
+
+def run(args, task_argv):
+    names = list(tasks.TASKS) if args.tasks == ['all'] else args.tasks
+    unknown = [name for name in names if name not in tasks.TASKS]
+    if unknown:
+        print('ERROR: UNKNOWN TASKS: ' + ', '.join(unknown) + ' (one of ' + ', '.join(tasks.TASKS) + ', or all)')
+        exit(2)
+
+    if args.force:
+        os.environ['UCRB_FORCE'] = '1'
+    for option, name in RUN_SETTINGS.items():
+        value = getattr(args, option)
+        if value is not None:
+            os.environ[name] = str(value)
+
+    parsed = parse_task_args(names, task_argv)
+    for name in names:
+        tasks.run_task(name, parsed[name])
+
+
+def main(argv=None):
+    args, rest = make_parser().parse_known_args(argv)
+    if args.command == 'run':
+        run(args, rest)
+        return
+    if rest:
+        print('ERROR: UNKNOWN ARGUMENTS: ' + ' '.join(rest))
+        exit(2)
+    if args.command == 'list':
+        list_tasks()
+    else:
+        ingest(args.force)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+# Helpers for single page dashboards that load their data on demand.
+# The page itself only holds the plots, the widgets and the data of the first selection. The data of
+# every other selection is written to a small sidecar '.js' file, which the page loads with a <script>
+# tag the first time it is selected. Script tags (unlike fetch) also work when the page is opened
+# straight from disk (file://), and BokehJS itself comes from the CDN, so every page stays small.
+import json
+import math
+
+from bokeh.models import CustomJS
+
+from ucrb import output
+
+# Name of the object in the browser that the sidecar files put their data into.
+DATA_GLOBAL = 'ucrb_dashboard_data'
+
+
+# Replaces NaN with None (null in JSON) in lists, dicts and floats, so the data is valid JSON.
+def _clean(value):
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, dict):
+        return {key: _clean(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_clean(item) for item in value]
+    return value
+
+
+# Writes the data of one selection ('key') to a sidecar file at 'path'.
+# 'payload' must be made of dicts, lists, strings and numbers.
+def write_sidecar(path, key, payload):
+    text = '(window.' + DATA_GLOBAL + ' = window.' + DATA_GLOBAL + ' || {})[' + json.dumps(key) + '] = ' + \
+           json.dumps(_clean(payload), separators=(',', ':')) + ';\n'
+    output.write_text(path, text)
+    return path
+
+
+# Returns a CustomJS callback that makes sure the data of the selection 'key_code' (a JS expression)
+# is loaded and then runs 'show_code' with it as 'd'.
+# 'sidecar_dir' is the folder of the sidecar files, relative to the page.
+def load_callback(args, key_code, show_code, sidecar_dir):
+    code = '''
+const key = ''' + key_code + ''';
+const data = window.''' + DATA_GLOBAL + ''' = window.''' + DATA_GLOBAL + ''' || {};
+function show(d) {
+''' + show_code + '''
+}
+if (key in data) {
+    show(data[key]);
+} else {
+    const script = document.createElement('script');
+    script.src = ''' + json.dumps(sidecar_dir.rstrip('/') + '/') + ''' + key + '.js';
+    script.onload = () => show(data[key]);
+    script.onerror = () => console.error('Could not load the data of ' + key + ' from ' + script.src);
+    document.head.appendChild(script);
+}
+'''
+    return CustomJS(args=args, code=code)
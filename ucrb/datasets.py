@@ -0,0 +1,38 @@
+# Joined datasets that more than one script works from.
+# Each join is done once and cached in memory and on disk ('data_store/cache', see 'ucrb/cache.py'),
+# and is only redone when one of its raw files changes.
+from ucrb import cache, months, stations, store
+
+
+# The monthly ET of one site joined with its monthly flow summary (task 3).
+# The store gives the ET data a year and month (from END_DATE), so the join is on those.
+# The month number is changed to its name (an ordered categorical), e.g. 1 --> 'Jan'.
+def _join_flow_et(site):
+    df_fl = store.load_flow_monthly(site).drop(columns='station_id')
+    df_et = store.load_et_monthly(site)
+
+    df_data = df_et.merge(df_fl, on=['year', 'month'], how='left')
+    df_data['month'] = months.month_names(df_data['month'])
+    return df_data
+
+
+def flow_et_sources(site):
+    return [store.table_paths('flow_monthly', site)[0], store.table_paths('et_monthly', site)[0]]
+
+
+def monthly_flow_et(site):
+    return cache.cached_frame('flow_et_monthly_' + site, flow_et_sources(site), lambda: _join_flow_et(site),
+                              persist=True)
+
+
+# The growing season ET and flow of every site and year joined with the precipitation means (task 6).
+# The join is on the integer station codes and the year (see 'ucrb/stations.py'); the site names of
+# the growing season table are kept.
+def _join_growing_season_pr():
+    df_pr = stations.with_codes(store.load_pr_means().drop(columns='site_name'))
+    return stations.with_codes(store.load_growing_season()).merge(df_pr, on=['station_id', 'year'], how='left')
+
+
+def growing_season_pr():
+    sources = [store.table_paths('growing_season')[0], store.table_paths('pr_means')[0]]
+    return cache.cached_frame('growing_season_pr', sources, _join_growing_season_pr)
@@ -0,0 +1,124 @@
+# Bulk export of statistic tables to Excel, Parquet and CSV.
+# All the tables of an output are assembled first and then written in one pass. The workbook is
+# written with xlsxwriter's constant_memory mode, one sheet per table, row by row: each row goes to
+# disk as soon as the next one is started, so the memory of the export stays flat however many
+# stations the tables hold. The same tables can also be written to one Parquet and/or CSV file,
+# stacked on top of each other with their sheet name in a 'table' column.
+#
+# Tables are passed around as {sheet name: (title, DataFrame)}. On a sheet the title is in the first
+# row, the column names in the second and the rows of the DataFrame below them.
+import os
+import datetime
+import hashlib
+import pandas as pd
+import xlsxwriter
+
+from ucrb import months, output
+
+FORMATS = ['xlsx', 'parquet', 'csv']
+
+# Excel does not take longer sheet names.
+MAX_SHEET_NAME = 31
+
+# Length of the hash that keeps a shortened sheet name unique.
+SHEET_HASH_LENGTH = 6
+
+# Creation date written into every workbook. xlsxwriter would write the current time, so the same
+# tables would give a different file on every run (and the tracked workbooks would always look changed).
+WORKBOOK_CREATED = datetime.datetime(2000, 1, 1)
+
+# Widths of the text (station, site name) and the number columns on a sheet.
+TEXT_WIDTH = 45
+NUMBER_WIDTH = 12
+
+
+# The name of a sheet made of 'parts', e.g. sheet_name('median_cfs', 'pearson_r') --> 'median_cfs pearson_r'
+# A name longer than Excel allows is cut short and ends in a hash of the whole name, so names that
+# only differ after the cut stay apart:
+#   sheet_name('a_very_long_flow_column_name', 'kendall_tau_high') --> 'a_very_long_flow_column_~62322d'
+def sheet_name(*parts):
+    name = ' '.join(parts)
+    if len(name) <= MAX_SHEET_NAME:
+        return name
+    digest = hashlib.sha1(name.encode()).hexdigest()[:SHEET_HASH_LENGTH]
+    return name[:MAX_SHEET_NAME - SHEET_HASH_LENGTH - 1] + '~' + digest
+
+
+# Turns monthly stats indexed by ('station_id', 'month', var_level), with month names as months, into
+# one table per (variable, statistic): a row per site in the order of 'sites', with its station id,
+# site name and a column per month (named with 'month_names').
+# Every table comes out of a single unstack of the selected rows.
+# Returns {(variable, statistic): DataFrame}.
+def monthly_tables(df_stats, sites, variables, stat_columns, site_names, var_level='x_var',
+                   month_names=months.MONTH_NAMES):
+    keep = df_stats.index.get_level_values('station_id').isin(sites) & \
+        df_stats.index.get_level_values(var_level).isin(variables)
+    df_wide = df_stats.loc[keep, list(stat_columns)].unstack('month')
+
+    tables = {}
+    for var in variables:
+        df_var = df_wide.xs(var, level=var_level).reindex(sites)
+        for stat in stat_columns:
+            df_table = df_var[stat].reindex(columns=months.MONTH_NAMES)
+            df_table.columns = list(month_names)
+            df_table.insert(0, 'site_name', [site_names[site] for site in sites])
+            tables[(var, stat)] = df_table.rename_axis('station_id').reset_index()
+    return tables
+
+
+# The paths written for 'path_stem' (a path without its extension) in each of 'formats'.
+def table_paths(path_stem, formats):
+    return [path_stem + '.' + fmt for fmt in formats]
+
+
+# Writes every table onto a sheet of its own in one workbook at 'path'.
+def write_xlsx(path, tables):
+    output.ensure_dir(os.path.dirname(os.path.abspath(path)))
+    tmp = path + '.' + str(os.getpid()) + '.tmp'
+    workbook = xlsxwriter.Workbook(tmp, {'constant_memory': True})
+    workbook.set_properties({'created': WORKBOOK_CREATED})
+    bold = workbook.add_format({'bold': True})
+
+    for name, (title, df) in tables.items():
+        ws = workbook.add_worksheet(name)
+        # With constant_memory the column widths must be set before any row is written.
+        for i, dtype in enumerate(df.dtypes):
+            ws.set_column(i, i, NUMBER_WIDTH if pd.api.types.is_numeric_dtype(dtype) else TEXT_WIDTH)
+        ws.write_string(0, 0, title, bold)
+        ws.write_row(1, 0, [str(column) for column in df.columns], bold)
+        # Missing values (NaN) are left as empty cells.
+        for row, values in enumerate(df.itertuples(index=False, name=None), start=2):
+            ws.write_row(row, 0, [None if value != value else value for value in values])
+
+    workbook.close()
+    os.replace(tmp, path)
+    return path
+
+
+# The tables stacked into one DataFrame, with the sheet name of every row in a 'table' column.
+def stack_tables(tables):
+    return pd.concat([df.assign(table=name)[['table'] + list(df.columns)] for name, (_, df) in tables.items()],
+                     ignore_index=True)
+
+
+# Writes the tables to '<path_stem>.xlsx', '.parquet' and/or '.csv'. Returns the paths written.
+def write_tables(path_stem, tables, formats=('xlsx',)):
+    paths = []
+    df_stacked = None
+    for fmt, path in zip(formats, table_paths(path_stem, formats)):
+        if fmt == 'xlsx':
+            paths.append(write_xlsx(path, tables))
+            continue
+        if df_stacked is None:
+            df_stacked = stack_tables(tables)
+        output.ensure_dir(os.path.dirname(os.path.abspath(path)))
+        tmp = path + '.' + str(os.getpid()) + '.tmp'
+        if fmt == 'parquet':
+            df_stacked.to_parquet(tmp, index=False)
+        elif fmt == 'csv':
+            df_stacked.to_csv(tmp, index=False)
+        else:
+            raise ValueError('Unknown table format: ' + fmt + ' (one of ' + ', '.join(FORMATS) + ')')
+        os.replace(tmp, path)
+        paths.append(path)
+    return paths
@@ -0,0 +1,54 @@
+# Heatmaps of the correlation matrices made by 'ucrb/matrices.py'.
+# Every site's heatmaps are drawn in a worker process of its own (see 'ucrb/runner.py'), so the
+# matrices of many sites are rendered in parallel.
+# matplotlib and seaborn are only imported when a heatmap is drawn; the caller picks the backend.
+import os
+
+import numpy as np
+
+from ucrb import matrices, output, runner
+
+TITLES = {'pearson': 'Pearson R', 'spearman': 'Spearman Rho', 'kendall': 'Kendall Tau'}
+
+
+# Draws the lower triangle of the 'method' matrix of 'site' on 'ax', like the original task 7 plots.
+def draw(ax, matrices_, site, method):
+    import seaborn as sns
+
+    names = list(matrices_['variables'])
+    matrix = np.round(matrices.site_matrix(matrices_, site, method), 2)
+    mask = np.triu(np.ones_like(matrix, dtype=bool))
+    sns.heatmap(matrix, annot=True, vmax=1, vmin=-1, center=0, cmap='viridis', mask=mask,
+                xticklabels=names, yticklabels=names, ax=ax)
+    ax.set_title(TITLES[method] + ' - ' + site)
+    return ax
+
+
+def heatmap_path(out_dir, site, method):
+    return os.path.join(out_dir, site.replace(' ', '_') + '_' + method + '_heatmap.png')
+
+
+# Saves the heatmap of every method of one site. Runs in a worker process.
+def save_site_heatmaps(site, matrices_, methods, out_dir):
+    import matplotlib.pyplot as plt
+
+    paths = []
+    for method in methods:
+        fig, ax = plt.subplots(figsize=(10, 8))
+        draw(ax, matrices_, site, method)
+        fig.tight_layout()
+        path = heatmap_path(out_dir, site, method)
+        fig.savefig(path)
+        plt.close(fig)
+        paths.append(path)
+    return paths
+
+
+# Saves the heatmaps of every site (and the pooled matrices) into 'out_dir', spread over 'workers'
+# processes. Returns the paths of the images.
+def save_heatmaps(matrices_, out_dir, methods=('pearson', 'kendall'), sites=None, workers=None):
+    output.ensure_dir(out_dir)
+    if sites is None:
+        sites = list(matrices_['sites'])
+    results = runner.run_sites(save_site_heatmaps, sites, matrices_, list(methods), out_dir, workers=workers)
+    return [path for paths in results for path in paths]
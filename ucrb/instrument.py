@@ -0,0 +1,203 @@
+# Per-stage timing and memory records of the task pipelines.
+# Every task wraps its load, join, compute, render and write stages in 'stage(...)'. Each stage adds
+# one record with its wall time, the CPU time of this process, the peak RSS of the process so far and
+# the rows it handled (also per station, see 'count'). Stages that run in worker processes (see
+# 'ucrb/runner.py') send their records back with their results.
+#
+# Settings (environment variables):
+#   UCRB_REPORT=<path>         write the run report there when the process exits, as CSV if the path
+#                              ends in '.csv' and as JSON otherwise
+#   UCRB_PROFILE=<stage>       profile every stage with this name ('load', 'compute', ...)
+#   UCRB_PROFILE_MODE=<mode>   'cprofile' (default): the stats are dumped to a .prof file
+#                              'tracemalloc': the peak traced memory goes into the record and the
+#                              lines that allocated the most are written to a .txt file
+#   UCRB_PROFILE_DIR=<dir>     where the profiles go (default '<data_store>/profiles')
+import atexit
+import cProfile
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import pandas as pd
+
+from ucrb import store
+
+STAGES = ['load', 'join', 'compute', 'render', 'write']
+
+RECORD_COLUMNS = ['task', 'stage', 'site', 'rows', 'site_rows', 'wall_s', 'cpu_s', 'peak_rss_mb', 'traced_peak_mb']
+
+PROFILE_MODES = ['cprofile', 'tracemalloc']
+
+# Lines listed in a tracemalloc profile.
+TOP_LINES = 25
+
+_records = []
+_task = None
+_report_pid = None
+_in_worker = False
+
+
+def set_task(name):
+    global _task
+    _task = name
+
+
+def task_name():
+    if _task:
+        return _task
+    return os.path.splitext(os.path.basename(sys.argv[0]))[0] or 'python'
+
+
+# Peak resident memory of this process so far in MB, or None where it cannot be read.
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        memory = psutil.Process().memory_info()
+        return round(getattr(memory, 'peak_wset', memory.rss) / 2 ** 20, 1)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux gives KB, macOS bytes.
+    return round(peak / (2 ** 20 if sys.platform == 'darwin' else 2 ** 10), 1)
+
+
+def profile_dir():
+    return os.environ.get('UCRB_PROFILE_DIR', os.path.join(store.STORE_DIR, 'profiles'))
+
+
+def _profile_path(record, ext):
+    name = '_'.join(str(part) for part in [record['task'], record['stage'], record['site']] if part is not None)
+    return os.path.join(profile_dir(), name.replace(' ', '_') + ext)
+
+
+def _start_profile(name):
+    if os.environ.get('UCRB_PROFILE') != name:
+        return None
+    mode = os.environ.get('UCRB_PROFILE_MODE', 'cprofile')
+    if mode not in PROFILE_MODES:
+        raise ValueError('Unknown UCRB_PROFILE_MODE: ' + mode + ' (one of ' + ', '.join(PROFILE_MODES) + ')')
+    if mode == 'tracemalloc':
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        return mode, started
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return mode, profiler
+
+
+def _stop_profile(profile, record):
+    mode, state = profile
+    os.makedirs(profile_dir(), exist_ok=True)
+    if mode == 'cprofile':
+        state.disable()
+        state.dump_stats(_profile_path(record, '.prof'))
+        return
+    record['traced_peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 1)
+    top = tracemalloc.take_snapshot().statistics('lineno')[:TOP_LINES]
+    with open(_profile_path(record, '_tracemalloc.txt'), 'w') as f:
+        f.write('\n'.join(str(line) for line in top) + '\n')
+    if state:
+        tracemalloc.stop()
+
+
+# Records one stage of the current task. The record is yielded, so the rows can be set on it:
+#     with instrument.stage('load', site) as record:
+#         df = store.load_et_monthly(site)
+#         record['rows'] = len(df)
+@contextmanager
+def stage(name, site=None, rows=None):
+    record = {'task': task_name(), 'stage': name, 'site': site, 'rows': rows}
+    profile = _start_profile(name)
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield record
+    finally:
+        record['wall_s'] = round(time.perf_counter() - wall, 4)
+        record['cpu_s'] = round(time.process_time() - cpu, 4)
+        if profile:
+            _stop_profile(profile, record)
+        record['peak_rss_mb'] = peak_rss_mb()
+        _records.append(record)
+        _register_report()
+
+
+# Sets the rows of a stage from the DataFrame it handled, and the rows of every station in it if it
+# has a 'by' column. Returns 'df', so it can wrap a load: df = instrument.count(record, load(...))
+def count(record, df, by='station_id'):
+    record['rows'] = len(df)
+    if by in df.columns:
+        site_rows = df[by].astype(str).value_counts(sort=False)
+        record['site_rows'] = {site: int(rows) for site, rows in site_rows.items()}
+    return df
+
+
+def records():
+    return list(_records)
+
+
+def clear():
+    del _records[:]
+
+
+# Calls func(site, *args) and returns its result together with the records of the stages it ran.
+# This is what the worker processes of 'ucrb/runner.py' run, so the records reach the main process.
+def collect(func, site, *args):
+    global _in_worker
+    _in_worker = True
+    start = len(_records)
+    result = func(site, *args)
+    return result, _records[start:]
+
+
+def merge(new_records):
+    _records.extend(new_records)
+
+
+# One row per record, plus the totals of every stage of every task.
+def report_frames():
+    df_records = pd.DataFrame(_records).reindex(columns=RECORD_COLUMNS)
+    df_totals = df_records.groupby(['task', 'stage'], sort=False).agg(
+        calls=('stage', 'size'), rows=('rows', 'sum'), wall_s=('wall_s', 'sum'), cpu_s=('cpu_s', 'sum'),
+        peak_rss_mb=('peak_rss_mb', 'max')).reset_index()
+    return df_records, df_totals
+
+
+# Writes the run report to 'path' (UCRB_REPORT by default): CSV if the path ends in '.csv', else JSON.
+def write_report(path=None):
+    path = path or os.environ.get('UCRB_REPORT')
+    if not path or not _records:
+        return None
+    df_records, df_totals = report_frames()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if path.endswith('.csv'):
+        df_records['site_rows'] = [json.dumps(rows) if isinstance(rows, dict) else None
+                                   for rows in df_records['site_rows']]
+        df_records.to_csv(path, index=False)
+    else:
+        report = {'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                  'totals': json.loads(df_totals.to_json(orient='records')),
+                  'stages': json.loads(df_records.to_json(orient='records'))}
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+    return path
+
+
+# The report is written once, by the main process (never by the workers).
+def _register_report():
+    global _report_pid
+    if _report_pid is None and not _in_worker and os.environ.get('UCRB_REPORT'):
+        _report_pid = os.getpid()
+        atexit.register(_write_report_at_exit)
+
+
+def _write_report_at_exit():
+    if os.getpid() == _report_pid:
+        write_report()
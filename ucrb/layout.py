@@ -0,0 +1,82 @@
+# Grid layouts for any number of site figures.
+# The figures are tiled 'ncols' to a row and, when they do not fit in one page under the size budget,
+# split over several HTML pages that link to each other. The first page is always written to the
+# path that was asked for, and the next ones get '_2', '_3', ... added to its name.
+#
+# The size budget (in bytes of serialized plot data) defaults to 2 MB and can be set with the
+# UCRB_PAGE_BYTES environment variable or the 'max_bytes' argument.
+import os
+from bokeh.document import Document
+from bokeh.core.json_encoder import serialize_json
+from bokeh.layouts import column, gridplot
+from bokeh.models import Div
+
+from ucrb import output
+
+
+def default_page_bytes():
+    return int(os.environ.get('UCRB_PAGE_BYTES', 2000000))
+
+
+# Size of a figure (its models and data) once serialized into a page.
+# The figure is added to a throwaway Document and taken out again, so it can still be saved afterwards.
+def figure_bytes(fig):
+    doc = Document()
+    doc.add_root(fig)
+    size = len(serialize_json(doc.to_json()))
+    doc.remove_root(fig)
+    return size
+
+
+# Splits the figures, in order, into pages that each stay under 'max_bytes'.
+# A page always holds at least one figure and at most 'max_figs' (if given) figures.
+def split_pages(figs, max_bytes=None, max_figs=None):
+    if max_bytes is None:
+        max_bytes = default_page_bytes()
+
+    pages = [[]]
+    page_bytes = 0
+    for fig in figs:
+        size = figure_bytes(fig)
+        full = max_figs is not None and len(pages[-1]) >= max_figs
+        if pages[-1] and (full or page_bytes + size > max_bytes):
+            pages.append([])
+            page_bytes = 0
+        pages[-1].append(fig)
+        page_bytes += size
+    return pages
+
+
+# Path of page 'number' (counting from 1) of a paged output.
+def page_path(path, number):
+    if number == 1:
+        return path
+    stem, ext = os.path.splitext(path)
+    return stem + '_' + str(number) + ext
+
+
+# Tiles the figures into a grid with 'ncols' figures to a row.
+def grid(figs, ncols=3):
+    return gridplot(list(figs), ncols=ncols)
+
+
+# Saves the figures as a grid over as many pages as needed and returns the paths written.
+# Pages left over from an earlier run with more pages are removed.
+def save_grid(figs, path, ncols=3, max_bytes=None, max_figs=None, title='Bokeh Plot'):
+    pages = split_pages(figs, max_bytes, max_figs)
+    paths = [page_path(path, number) for number in range(1, len(pages) + 1)]
+
+    for number, page in enumerate(pages, start=1):
+        layout = grid(page, ncols)
+        if len(pages) > 1:
+            links = ['<b>' + str(n) + '</b>' if n == number else
+                     '<a href="' + os.path.basename(paths[n - 1]) + '">' + str(n) + '</a>'
+                     for n in range(1, len(pages) + 1)]
+            layout = column(Div(text='Page: ' + ' | '.join(links)), layout)
+        output.save_html(layout, paths[number - 1], title)
+
+    number = len(pages) + 1
+    while os.path.exists(page_path(path, number)):
+        os.remove(page_path(path, number))
+        number += 1
+    return paths
@@ -0,0 +1,210 @@
+# Correlation matrices of many variables for every site (and all sites pooled) in one batched pass.
+# The data of the sites is stacked into a (sites, rows, variables) array padded with NaN, and every
+# statistic of every site and pair of variables comes from a few NumPy sums over it:
+#   - Pearson's r from pairwise complete sums (the same as pandas' DataFrame.corr)
+#   - Spearman's rho as Pearson's r of the ranks of every column
+#   - Kendall's tau-b from the signs of the differences between all pairs of rows, or, for groups of
+#     more than KENDALL_PAIR_ROWS rows (e.g. all sites pooled), with scipy's kendalltau cell by cell
+# The p-values are the ones scipy gives (pearsonr, spearmanr and kendalltau, including its exact test
+# for small samples without ties).
+#
+# Ranks and tie counts are taken over the rows where a column has a value. When the two columns of a
+# cell have values in different rows, its Spearman and Kendall stats are computed on their own with
+# scipy instead (such cells are rare: the joined tables here have no missing values).
+#
+# The result is a dict of (sites, variables, variables) arrays: 'n' (pairs in each cell) and, for every
+# method in METHODS, the coefficient (e.g. 'kendall') and its p-value (e.g. 'kendall_p'), plus the
+# 'sites' and 'variables' labelling the axes. 'save_matrices' / 'load_matrices' keep it in one .npz file.
+from functools import lru_cache
+
+import numpy as np
+from scipy import special
+from scipy import stats as sp_stats
+
+from ucrb import stats
+
+METHODS = ['pearson', 'spearman', 'kendall']
+
+# Label of the pooled matrix (every site together).
+POOLED = 'All Sites'
+
+# Above this many rows in a group, Kendall's tau is found with scipy's O(n log n) kendalltau for every
+# cell instead of from all the pairs of rows, whose (groups, pairs, variables) arrays grow with the
+# square of the rows (the pooled matrix of a hundred sites would need GBs).
+KENDALL_PAIR_ROWS = 1000
+
+
+# The values of 'variables' of every group of 'df' as one (groups, rows, variables) array padded with NaN.
+def _stack_groups(df, variables, by):
+    labels = []
+    blocks = []
+    for label, df_group in df.groupby(by, sort=True, observed=True):
+        labels.append(label)
+        blocks.append(df_group[variables].to_numpy(dtype=float))
+    rows = max([len(block) for block in blocks] + [0])
+    values = np.full((len(blocks), rows, len(variables)), np.nan)
+    for i, block in enumerate(blocks):
+        values[i, :len(block)] = block
+    return labels, values
+
+
+# Pearson's r of every pair of columns of every group, over the rows where both have a value.
+def _pearson(values, valid):
+    values = np.where(valid, values - np.nanmean(values, axis=1, keepdims=True), 0)
+    weights = valid.astype(float)
+    n = np.einsum('gtv,gtw->gvw', weights, weights)
+    sum_x = np.einsum('gtv,gtw->gvw', values, weights)
+    sum_xx = np.einsum('gtv,gtw->gvw', values * values, weights)
+    sum_xy = np.einsum('gtv,gtw->gvw', values, values)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        var_x = sum_xx - sum_x * sum_x / n
+        r = (sum_xy - sum_x * sum_x.transpose(0, 2, 1) / n) / np.sqrt(var_x * var_x.transpose(0, 2, 1))
+    return np.clip(r, -1, 1)
+
+
+# For every group and column: (xtie, x0, x1) of the values of the column, the tie counts that go into
+# the variance of Kendall's tau (the same as scipy's kendalltau).
+def _tie_counts(values, valid):
+    groups, _, columns = values.shape
+    ties = np.zeros((3, groups, columns))
+    for g in range(groups):
+        for v in range(columns):
+            counts = np.unique(values[g, valid[g, :, v], v], return_counts=True)[1].astype(float)
+            counts = counts[counts > 1]
+            ties[:, g, v] = [(counts * (counts - 1) / 2).sum(), (counts * (counts - 1) * (counts - 2)).sum(),
+                             (counts * (counts - 1) * (2 * counts + 5)).sum()]
+    return ties
+
+
+# Probability that a random ordering of 'n' values has at most k inversions, for k = 0 .. n(n-1)/2.
+# (Kendall's exact null distribution, built one value at a time.)
+@lru_cache(maxsize=None)
+def _kendall_exact_cdf(n):
+    probabilities = np.ones(1)
+    for j in range(2, n + 1):
+        probabilities = np.convolve(probabilities, np.ones(j) / j)
+    return np.cumsum(probabilities)
+
+
+# Kendall's tau-b and its p-value for every pair of columns of every group, from the signs of the
+# differences between all pairs of rows.
+def _kendall(values, valid, n):
+    rows = values.shape[1]
+    i, j = np.triu_indices(rows, 1)
+    pair_valid = (valid[:, i, :] & valid[:, j, :]).astype(float)
+    signs = np.nan_to_num(np.sign(values[:, j, :] - values[:, i, :])) * pair_valid
+
+    con_minus_dis = np.einsum('gpv,gpw->gvw', signs, signs)
+    untied = np.einsum('gpv,gpw->gvw', np.abs(signs), pair_valid)
+    total = n * (n - 1) / 2
+    xtie = total - untied
+    ytie = xtie.transpose(0, 2, 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        tau = np.clip(con_minus_dis / np.sqrt(untied * untied.transpose(0, 2, 1)), -1, 1)
+
+    # Asymptotic p-value, with the variance corrected for ties.
+    ties = _tie_counts(values, valid)
+    x0, x1 = ties[1][:, :, None], ties[2][:, :, None]
+    y0, y1 = ties[1][:, None, :], ties[2][:, None, :]
+    m = n * (n - 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        var = (m * (2 * n + 5) - x1 - y1) / 18 + 2 * xtie * ytie / m + x0 * y0 / (9 * m * (n - 2))
+        p = special.erfc(np.abs(con_minus_dis) / np.sqrt(2 * var))
+
+    # Exact p-value without ties, for small samples or (nearly) perfect orderings, like scipy.
+    discordant = (total - con_minus_dis) / 2
+    exact = (xtie == 0) & (ytie == 0) & ((n <= 33) | (np.minimum(discordant, total - discordant) <= 1)) & (n > 1)
+    for cell in zip(*np.nonzero(exact)):
+        size = int(n[cell])
+        c = int(round(min(discordant[cell], total[cell] - discordant[cell])))
+        p[cell] = min(1.0, 2 * _kendall_exact_cdf(size)[c])
+
+    undefined = (xtie == total) | (ytie == total)
+    tau[undefined] = np.nan
+    p[undefined] = np.nan
+    return tau, p
+
+
+# Kendall's tau-b and its p-value for every pair of columns of every group, one cell at a time with
+# scipy, over the rows where both columns have a value. Used for the groups that are too big for '_kendall'.
+def _kendall_by_cell(values, valid):
+    groups, _, columns = values.shape
+    tau = np.full((groups, columns, columns), np.nan)
+    p = np.full((groups, columns, columns), np.nan)
+    for g in range(groups):
+        for v in range(columns):
+            for w in range(v, columns):
+                both = valid[g, :, v] & valid[g, :, w]
+                if both.sum() < 2:
+                    continue
+                result = sp_stats.kendalltau(values[g, both, v], values[g, both, w])
+                tau[g, v, w] = tau[g, w, v] = result.statistic
+                p[g, v, w] = p[g, w, v] = result.pvalue
+    return tau, p
+
+
+# All the stats of one (groups, rows, variables) array.
+def _group_matrices(values):
+    valid = ~np.isnan(values)
+    weights = valid.astype(float)
+    n = np.einsum('gtv,gtw->gvw', weights, weights)
+    result = {'n': n.astype(int)}
+
+    result['pearson'] = _pearson(values, valid)
+    result['pearson_p'] = stats.pearson_p_value(result['pearson'], n)
+
+    ranks = sp_stats.rankdata(values, axis=1, nan_policy='omit')
+    result['spearman'] = _pearson(ranks, valid)
+    result['spearman_p'] = stats.pearson_p_value(result['spearman'], n)
+
+    if values.shape[1] > KENDALL_PAIR_ROWS:
+        result['kendall'], result['kendall_p'] = _kendall_by_cell(values, valid)
+    else:
+        result['kendall'], result['kendall_p'] = _kendall(values, valid, n)
+
+    # Cells whose columns have values in different rows.
+    n_column = np.diagonal(n, axis1=1, axis2=2)
+    mixed = (n != n_column[:, :, None]) | (n != n_column[:, None, :])
+    for g, v, w in zip(*np.nonzero(mixed)):
+        both = valid[g, :, v] & valid[g, :, w]
+        x, y = values[g, both, v], values[g, both, w]
+        if both.sum() < 2:
+            for key in METHODS[1:]:
+                result[key][g, v, w] = result[key + '_p'][g, v, w] = np.nan
+            continue
+        result['spearman'][g, v, w], result['spearman_p'][g, v, w] = sp_stats.spearmanr(x, y)
+        result['kendall'][g, v, w], result['kendall_p'][g, v, w] = sp_stats.kendalltau(x, y)
+    return result
+
+
+# Pearson, Spearman and Kendall correlation matrices of 'variables' for every value of 'by' (e.g. every
+# station), with their p-values and the number of pairs in every cell.
+# If 'pooled' is set, the matrices of all rows together are added last, labelled POOLED.
+def correlation_matrices(df, variables, by='station_id', pooled=True):
+    variables = list(variables)
+    labels, values = _stack_groups(df, variables, by)
+    result = _group_matrices(values)
+
+    if pooled:
+        pooled_result = _group_matrices(df[variables].to_numpy(dtype=float)[None])
+        result = {key: np.concatenate([result[key], pooled_result[key]]) for key in result}
+        labels = labels + [POOLED]
+
+    result['sites'] = np.array([str(label) for label in labels])
+    result['variables'] = np.array(variables)
+    return result
+
+
+# The matrix of one method ('pearson', 'spearman', 'kendall', or their '_p' p-values, or 'n') of one site.
+def site_matrix(matrices, site, key):
+    return matrices[key][list(matrices['sites']).index(site)]
+
+
+def save_matrices(path, matrices):
+    np.savez_compressed(path, **matrices)
+    return path
+
+
+def load_matrices(path):
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
@@ -0,0 +1,19 @@
+# Month names used on every plot and table.
+import numpy as np
+import pandas as pd
+
+MONTH_NAMES = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sept', 'Oct', 'Nov', 'Dec']
+
+# Full month names, used as the column names of the task 3 tables.
+FULL_MONTH_NAMES = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September',
+                    'October', 'November', 'December']
+
+# Ordered categorical type for month names, so sorting and grouping keep calendar order.
+MONTH_DTYPE = pd.CategoricalDtype(MONTH_NAMES, ordered=True)
+
+
+# Changes month numbers (1 - 12) into month names without a per-row lookup.
+# Example: 1 --> 'Jan'
+def month_names(month_numbers):
+    codes = np.asarray(month_numbers, dtype=np.int8) - 1
+    return pd.Categorical.from_codes(codes, dtype=MONTH_DTYPE)
@@ -0,0 +1,44 @@
+# Output layer for plots and tables.
+# Everything is written to an explicit path. Nothing here changes the working directory or uses
+# Bokeh's global output_file()/curdoc() state, and every plot is rendered into its own Document,
+# so these functions can be called from thread pools or a long running server without races.
+# Bokeh is only imported when something is rendered, so the tasks can use 'ensure_dir' and
+# 'write_text' without loading it.
+import os
+import threading
+
+
+# Makes the directory (and its parents) if it does not exist yet and returns it.
+def ensure_dir(path):
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+# Writes 'text' to 'path' through a temporary file so a reader never sees half a file.
+def write_text(path, text):
+    ensure_dir(os.path.dirname(os.path.abspath(path)))
+    tmp = path + '.' + str(os.getpid()) + '.' + str(threading.get_ident()) + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+# Renders a Bokeh figure or layout into a standalone HTML page.
+# The object is added to a new Document, so it must not already belong to another one.
+# 'resources' defaults to Bokeh's CDN.
+def render_html(obj, title='Bokeh Plot', resources=None):
+    from bokeh.document import Document
+    from bokeh.embed import file_html
+    from bokeh.resources import CDN
+
+    if resources is None:
+        resources = CDN
+    doc = Document()
+    doc.add_root(obj)
+    return file_html(doc, resources, title)
+
+
+# Saves a Bokeh figure or layout as a standalone HTML file at 'path'.
+def save_html(obj, path, title='Bokeh Plot', resources=None):
+    write_text(path, render_html(obj, title, resources))
+    return path
@@ -0,0 +1,109 @@
+# Statistics of daily data over calendar periods.
+# A period tells which days belong together: every month, every water year, or a season (a range
+# of days repeated every year, like the Apr - Sept growing season). 'period_stats' computes any set of
+# the statistics of 'ucrb/aggregate.py' (mean, median, min, max, quantiles, exceedance percentiles, ...)
+# for every station and period in one groupby pass.
+#
+# The monthly summary files in 'raw_data/flow' and the growing season flow of task 4 are both
+# made from the daily flow this way. Run 'python -m ucrb.periods' to rebuild the monthly summaries.
+import os
+import numpy as np
+
+from ucrb import aggregate, store
+
+
+# A period is a function that takes a daily DataFrame (with 'year', 'month' and 'day' columns) and
+# returns (mask, keys): a boolean array of the days that belong to any period and a dict of the
+# columns that name the period of each day.
+
+# Every calendar month, named by (year, month).
+def month(df):
+    return np.ones(len(df), dtype=bool), {'year': df['year'], 'month': df['month']}
+
+
+# Every water year (Oct - Sept), named by the calendar year it ends in.
+def water_year(df):
+    return np.ones(len(df), dtype=bool), {'water_year': (df['year'] + (df['month'] >= 10)).astype('int16')}
+
+
+# A season from 'start' to 'end' (both inclusive) in every year, given as (month, day).
+# A season that runs over the new year (e.g. (11, 1) to (3, 31)) is named by the year it ends in.
+def season(start, end, name='year'):
+    start_key = start[0] * 100 + start[1]
+    end_key = end[0] * 100 + end[1]
+
+    def period(df):
+        day_key = df['month'].astype('int16') * 100 + df['day']
+        if start_key <= end_key:
+            mask = (day_key >= start_key) & (day_key <= end_key)
+            year = df['year']
+        else:
+            mask = (day_key >= start_key) | (day_key <= end_key)
+            year = df['year'] + (day_key >= start_key)
+        return mask.to_numpy(), {name: year.astype('int16')}
+
+    return period
+
+
+# The growing season used by tasks 4, 5 and 6 (the same months as 'aggregate.GROWING_SEASON_MONTHS').
+def growing_season():
+    return season((aggregate.GROWING_SEASON_MONTHS[0], 1), (aggregate.GROWING_SEASON_MONTHS[-1], 31))
+
+
+PERIODS = {
+    'month': month,
+    'water_year': water_year,
+    'growing_season': growing_season(),
+}
+
+
+# Statistics of 'value_cols' for every station (or whatever 'by' holds) and period.
+# 'period' is a name from PERIODS or a period function, and 'stats' are names understood by
+# 'aggregate.group_stats' ('mean', 'median', 'min', 'max', 'q25', 'exc10', ...).
+# The result is indexed by the 'by' columns and the period's key columns and has
+# (value column, statistic) columns.
+def period_stats(df, value_cols, period, stats=('mean',), by=('station_id',)):
+    if isinstance(period, str):
+        period = PERIODS[period]
+    mask, keys = period(df)
+
+    by = [col for col in by if col in df.columns]
+    df_period = df.loc[mask, by + list(value_cols)]
+    for name, values in keys.items():
+        df_period[name] = values[mask]
+
+    return aggregate.group_stats(df_period, value_cols, by + list(keys), stats)
+
+
+#######################################################
+# Monthly summary files
+
+# Statistic name -> column of the monthly summary files.
+MONTHLY_SUMMARY_STATS = {'min': 'min_cfs', 'max': 'max_cfs', 'mean': 'mean_cfs', 'median': 'median_cfs',
+                         'q25': 'Q25_cfs'}
+
+
+# Builds the monthly summary of one station from its daily flow, in the layout of the
+# '<site>_monthly_summary.csv' files (date, year, month, min_cfs, max_cfs, mean_cfs, median_cfs, Q25_cfs).
+def monthly_summary(df_daily):
+    df_stats = period_stats(df_daily, ['discharge_cfs'], month, list(MONTHLY_SUMMARY_STATS), by=())
+    df_stats = df_stats['discharge_cfs'].rename(columns=MONTHLY_SUMMARY_STATS).reset_index()
+
+    df_stats.insert(0, 'date', df_stats['year'].astype(str) + '-' + df_stats['month'].astype(str).str.zfill(2))
+    df_stats['month'] = df_stats['month'].astype(str).str.zfill(2)
+    return df_stats
+
+
+# Rebuilds the monthly summary file of every station that has daily flow.
+def write_monthly_summaries():
+    written = []
+    for site in store.stations_with_data('flow_daily'):
+        path = store.table_paths('flow_monthly', site)[0]
+        monthly_summary(store.load_flow_daily(site)).to_csv(path, index=False)
+        written.append(path)
+    return written
+
+
+if __name__ == '__main__':
+    for path in write_monthly_summaries():
+        print('Wrote ' + os.path.relpath(path, store.REPO_DIR))
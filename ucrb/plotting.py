@@ -0,0 +1,95 @@
+# Regression overlays for the Bokeh scatter plots.
+# The least squares line is fitted once with NumPy and drawn as a single segment from the smallest
+# to the largest x, so every plot carries 2 points for it instead of one per data point.
+# A confidence band for the fitted line can be added as well; set UCRB_CONFIDENCE_BAND to a level
+# (e.g. 0.95) to shade it on every plot. The band belongs to the fit that drew the line: the least
+# squares band for 'ols', the weighted least squares band for 'weighted', and none for 'theil_sen'
+# (Sen's slope has no closed form band, so only its line is drawn).
+import os
+import numpy as np
+from scipy import stats
+
+
+def default_band():
+    band = os.environ.get('UCRB_CONFIDENCE_BAND')
+    return float(band) if band else None
+
+
+# Number of x positions the confidence band is evaluated at.
+BAND_POINTS = 50
+
+
+# The finite (x, y) pairs of two columns as float arrays.
+def _finite_pairs(x, y):
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    keep = np.isfinite(x) & np.isfinite(y)
+    return x[keep], y[keep]
+
+
+# Least squares fit y = slope * x + intercept, or (nan, nan) with fewer than 2 distinct x values.
+def fit_line(x, y):
+    x, y = _finite_pairs(x, y)
+    if len(x) < 2 or np.ptp(x) == 0:
+        return np.nan, np.nan
+    slope, intercept = np.polyfit(x, y, 1)
+    return slope, intercept
+
+
+# End points ([x0, x1], [y0, y1]) of the line over the range of 'x'; empty if there is no line.
+def line_points(x, slope, intercept):
+    x = np.asarray(x, dtype=float)
+    x = x[np.isfinite(x)]
+    if len(x) == 0 or not np.isfinite(slope) or not np.isfinite(intercept):
+        return np.array([]), np.array([])
+    x_ends = np.array([x.min(), x.max()])
+    return x_ends, slope * x_ends + intercept
+
+
+# Confidence band of the fitted line (the mean response) at 'level', evaluated at BAND_POINTS
+# x positions over the range of the data. Returns (x, lower, upper) arrays, empty with under 3 points.
+# With 'weights' (e.g. PIXEL_COUNT) it is the band of a weighted least squares line: the residuals,
+# the mean of x and its spread are all weighted (a missing weight counts as 0, as in 'ucrb/stats.py').
+def confidence_band(x, y, slope, intercept, level=0.95, points=BAND_POINTS, weights=None):
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    w = np.ones(len(x)) if weights is None else np.nan_to_num(np.asarray(weights, dtype=float))
+    keep = np.isfinite(x) & np.isfinite(y)
+    x, y, w = x[keep], y[keep], w[keep]
+    n = len(x)
+    if n < 3 or not np.isfinite(slope) or w.sum() <= 0:
+        return np.array([]), np.array([]), np.array([])
+
+    residuals = y - (slope * x + intercept)
+    s = np.sqrt(np.sum(w * residuals ** 2) / (n - 2))
+    x_mean = np.sum(w * x) / w.sum()
+    sxx = np.sum(w * (x - x_mean) ** 2)
+
+    x_grid = np.linspace(x.min(), x.max(), points)
+    half_width = stats.t.ppf((1 + level) / 2, n - 2) * s * np.sqrt(1 / w.sum() + (x_grid - x_mean) ** 2 / sxx)
+    y_grid = slope * x_grid + intercept
+    return x_grid, y_grid - half_width, y_grid + half_width
+
+
+# Draws the regression line of y on x onto the Bokeh figure 'p' and returns (slope, intercept).
+# The fit is done here unless 'slope' and 'intercept' are given (e.g. from 'ucrb/stats.py'); 'fit'
+# says which fit they came from (one of stats.FITS), and 'weights' are the weights of a 'weighted' fit.
+# If 'band' is a confidence level (e.g. 0.95), the confidence band of the line is shaded as well
+# (by default only if UCRB_CONFIDENCE_BAND is set), except for 'theil_sen' lines (see the top of this file).
+def add_regression_line(p, x, y, slope=None, intercept=None, band=None, color='black', fit='ols', weights=None):
+    if band is None:
+        band = default_band()
+    if slope is None or intercept is None:
+        slope, intercept = fit_line(x, y)
+
+    x_ends, y_ends = line_points(_finite_pairs(x, y)[0], slope, intercept)
+    if len(x_ends):
+        p.line(x_ends, y_ends, color=color)
+
+    if band is not None and fit != 'theil_sen':
+        x_grid, lower, upper = confidence_band(x, y, slope, intercept, band,
+                                               weights=weights if fit == 'weighted' else None)
+        if len(x_grid):
+            p.varea(x=x_grid, y1=lower, y2=upper, fill_color=color, fill_alpha=0.15)
+
+    return slope, intercept
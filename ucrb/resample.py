@@ -0,0 +1,162 @@
+# Bootstrap confidence intervals and permutation p-values for the correlations of every group.
+# With around a dozen yearly points per site and month, the asymptotic p-values of scipy are rough, so
+# these are found by resampling instead:
+#   - bootstrap: the (x, y) pairs of a group are drawn with replacement, and the confidence interval is
+#     the percentile interval of the resampled correlations
+#   - permutation: y is shuffled against x, and the p-value is the share of shuffles with a correlation
+#     at least as strong (two sided) as the observed one
+#
+# The resamples are not looped over. Groups with the same number of points are stacked, and the
+# resample indices of all of them form one (groups, resamples, points) array, so Pearson's r and
+# Kendall's tau of every resample come from a few NumPy expressions.
+# Every group draws from its own random generator, seeded from 'seed' and the group's position, so
+# the results are the same for a given seed however the groups are spread over worker processes.
+import os
+import numpy as np
+import pandas as pd
+
+from ucrb import runner, stats
+
+RESAMPLE_COLUMNS = ['pearson_r_low', 'pearson_r_high', 'pearson_perm_p',
+                    'kendall_tau_low', 'kendall_tau_high', 'kendall_perm_p', 'n']
+
+DEFAULT_RESAMPLES = 2000
+DEFAULT_SEED = 0
+
+# Upper limit on the number of values in one batch of pairwise differences (Kendall's tau), which
+# keeps the memory use of a batch to a few hundred MB.
+BATCH_VALUES = 4000000
+
+
+def default_resamples():
+    resamples = os.environ.get('UCRB_RESAMPLES')
+    return int(resamples) if resamples else DEFAULT_RESAMPLES
+
+
+# The resamples the tasks make when '--resamples' is not given: UCRB_RESAMPLES, or none at all.
+# Resampling is slow, so the tasks only do it when it is asked for.
+def requested_resamples():
+    resamples = os.environ.get('UCRB_RESAMPLES')
+    return int(resamples) if resamples else 0
+
+
+# Pearson's r of every row of x and y (arrays of the same shape, points along the last axis).
+def pearson_rows(x, y):
+    dx = x - x.mean(axis=-1, keepdims=True)
+    dy = y - y.mean(axis=-1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        r = (dx * dy).sum(axis=-1) / np.sqrt((dx * dx).sum(axis=-1) * (dy * dy).sum(axis=-1))
+    return np.clip(r, -1, 1)
+
+
+# Kendall's tau-b (the one scipy computes) of every row of x and y, from the signs of all pairwise
+# differences of the points.
+def kendall_rows(x, y):
+    n = x.shape[-1]
+    i, j = np.triu_indices(n, 1)
+    sign_x = np.sign(x[..., j] - x[..., i])
+    sign_y = np.sign(y[..., j] - y[..., i])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (sign_x * sign_y).sum(axis=-1) / np.sqrt(np.abs(sign_x).sum(axis=-1) * np.abs(sign_y).sum(axis=-1))
+
+
+# Pearson's r and Kendall's tau of the resamples of groups with 'n' points each, taken in batches of
+# resamples. 'x_index' and 'y_index' are (groups, resamples, n) arrays of indices into the rows of
+# 'x' and 'y' (the (groups, n) data of the groups).
+def _batched_correlations(x, y, x_index, y_index):
+    groups, resamples, n = y_index.shape
+    batch = max(1, BATCH_VALUES // max(1, groups * n * (n - 1) // 2))
+    rows = np.arange(groups)[:, None, None]
+    r = np.empty((groups, resamples))
+    tau = np.empty((groups, resamples))
+    for start in range(0, resamples, batch):
+        x_batch = x[rows, x_index[:, start:start + batch, :]]
+        y_batch = y[rows, y_index[:, start:start + batch, :]]
+        r[:, start:start + batch] = pearson_rows(x_batch, y_batch)
+        tau[:, start:start + batch] = kendall_rows(x_batch, y_batch)
+    return r, tau
+
+
+# Resampling stats of a list of groups of the same size: 'group_ids' are their positions (used for
+# seeding) and 'x', 'y' are (groups, n) arrays. Runs in a worker process when a pool is used.
+def _resample_groups(task, resamples, level, seed):
+    group_ids, x, y = task
+    groups, n = x.shape
+    rngs = [np.random.default_rng([seed, group_id]) for group_id in group_ids]
+    boot_index = np.stack([rng.integers(0, n, size=(resamples, n)) for rng in rngs])
+    perm_index = np.stack([rng.permuted(np.tile(np.arange(n), (resamples, 1)), axis=1) for rng in rngs])
+
+    observed_r = pearson_rows(x, y)
+    observed_tau = kendall_rows(x, y)
+
+    boot_r, boot_tau = _batched_correlations(x, y, boot_index, boot_index)
+    # Only y is shuffled, so x keeps its order.
+    perm_r, perm_tau = _batched_correlations(x, y, np.broadcast_to(np.arange(n), perm_index.shape), perm_index)
+
+    tail = (1 - level) / 2 * 100
+    with np.errstate(invalid='ignore'):
+        result = {
+            'pearson_r_low': _nanpercentile(boot_r, tail),
+            'pearson_r_high': _nanpercentile(boot_r, 100 - tail),
+            'pearson_perm_p': _permutation_p(perm_r, observed_r),
+            'kendall_tau_low': _nanpercentile(boot_tau, tail),
+            'kendall_tau_high': _nanpercentile(boot_tau, 100 - tail),
+            'kendall_perm_p': _permutation_p(perm_tau, observed_tau),
+        }
+    return group_ids, result
+
+
+# Percentile of every row, ignoring the resamples whose correlation is undefined (e.g. all x equal).
+def _nanpercentile(values, q):
+    result = np.full(len(values), np.nan)
+    defined = ~np.isnan(values).all(axis=1)
+    result[defined] = np.nanpercentile(values[defined], q, axis=1)
+    return result
+
+
+# Two sided permutation p-value, counting the observed data as one of the permutations.
+def _permutation_p(permuted, observed):
+    extreme = (np.abs(permuted) >= np.abs(observed)[:, None] - 1e-12).sum(axis=1)
+    p = (extreme + 1) / (permuted.shape[1] + 1)
+    p[np.isnan(observed)] = np.nan
+    return p
+
+
+# Bootstrap confidence intervals ('level') and permutation p-values of Pearson's r and Kendall's tau
+# of y against x for every group, from 'resamples' resamples of each.
+# 'x_vars', 'y_var' and 'by' work as in 'stats.correlation_stats'. The groups are spread over
+# 'workers' processes (see 'ucrb/runner.py').
+# Returns a DataFrame indexed by the 'by' columns plus 'x_var' with the columns in RESAMPLE_COLUMNS.
+def resample_stats(df, x_vars, y_var, by, resamples=None, level=0.95, seed=DEFAULT_SEED, workers=None):
+    if resamples is None:
+        resamples = default_resamples()
+    if isinstance(x_vars, str):
+        x_vars = [x_vars]
+    keys = list(by) + ['x_var']
+    df_pairs = stats._long_pairs(df, x_vars, y_var, by)
+    grouped = df_pairs.groupby(keys, sort=True, observed=True)
+
+    codes = grouped.ngroup().to_numpy()
+    order = np.argsort(codes, kind='stable')
+    x, y = df_pairs['x'].to_numpy()[order], df_pairs['y'].to_numpy()[order]
+    counts = np.bincount(codes)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+    # One task per group size, split further so that every worker gets some of the groups.
+    if workers is None:
+        workers = runner.default_workers()
+    tasks = []
+    for n in np.unique(counts):
+        if n < 3:
+            continue
+        sized = np.flatnonzero(counts == n)
+        for group_ids in np.array_split(sized, min(len(sized), max(1, workers))):
+            index = starts[group_ids][:, None] + np.arange(n)
+            tasks.append((group_ids, x[index], y[index]))
+
+    df_result = pd.DataFrame(np.nan, index=grouped.size().index, columns=RESAMPLE_COLUMNS)
+    for group_ids, result in runner.run_sites(_resample_groups, tasks, resamples, level, seed, workers=workers):
+        for column, values in result.items():
+            df_result.iloc[group_ids, df_result.columns.get_loc(column)] = values
+    df_result['n'] = counts
+    return df_result
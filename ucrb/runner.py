@@ -0,0 +1,43 @@
+# Runs per-site work in parallel over a pool of worker processes.
+# Each site is loaded, computed and rendered by one worker on its own; the results come back in
+# the order of the site list so anything combined from them (grid plots, tables) is deterministic.
+#
+# The number of workers defaults to the number of CPUs and can be set with the UCRB_WORKERS
+# environment variable or the 'workers' argument. With 1 worker everything runs in this process.
+#
+# The stage records of 'ucrb/instrument.py' made in a worker come back with its result.
+#
+# Scripts that use the runner must only start their work under "if __name__ == '__main__':",
+# because worker processes may import the script again.
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from ucrb import instrument
+
+
+def default_workers():
+    workers = os.environ.get('UCRB_WORKERS')
+    if workers:
+        return max(1, int(workers))
+    return os.cpu_count() or 1
+
+
+# Calls func(site, *args) for every site and returns the results in the order of 'sites'.
+# 'func' must be a module level function so that it can be sent to the worker processes.
+def run_sites(func, sites, *args, workers=None):
+    sites = list(sites)
+    if workers is None:
+        workers = default_workers()
+    workers = min(workers, len(sites))
+
+    if workers <= 1:
+        return [func(site, *args) for site in sites]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(instrument.collect, func, site, *args) for site in sites]
+        results = []
+        for future in futures:
+            result, records = future.result()
+            instrument.merge(records)
+            results.append(result)
+        return results
@@ -0,0 +1,96 @@
+# Station registry.
+# Built once per process from metadata.csv and keyed by the zero padded station id, so looking up the
+# name, location or data availability of a station is a dict lookup instead of a scan of the metadata.
+# Every station also gets a small integer code (its position in station id order). Tables can turn
+# their 'station_id' column into a categorical on these codes ('with_codes'), so joins, filters and
+# groupbys on stations compare integers rather than strings.
+#
+# The sites a task works on are found from the data instead of being listed by hand: the stations
+# marked data_available == YES in the metadata that also have rows in the tables the task reads.
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from ucrb import store
+
+FIELDS = ['site_name', 'latitude', 'longitude', 'data_available']
+
+
+@lru_cache(maxsize=None)
+def _registry():
+    df_metadata = store.load_metadata()
+    df_metadata = df_metadata.drop_duplicates('station_id').sort_values('station_id')
+    records = {row['station_id']: dict(row, code=code)
+               for code, row in enumerate(df_metadata[['station_id'] + FIELDS].to_dict('records'))}
+    dtype = pd.CategoricalDtype(list(records), ordered=True)
+    return records, dtype
+
+
+# Forgets the registry, so the next lookup reads metadata.csv again.
+def reload():
+    _registry.cache_clear()
+
+
+# Every station id in the metadata, in code order.
+def station_ids():
+    return list(_registry()[0])
+
+
+# Everything the metadata says about one station, plus its 'code'.
+def station(station_id):
+    records = _registry()[0]
+    station_id = store.normalize_station_id(station_id)
+    if station_id not in records:
+        raise KeyError('Unknown station: ' + station_id)
+    return records[station_id]
+
+
+def site_name(station_id):
+    return station(station_id)['site_name']
+
+
+# {station id: site name} of every station.
+def site_names():
+    return {station_id: record['site_name'] for station_id, record in _registry()[0].items()}
+
+
+def code(station_id):
+    return station(station_id)['code']
+
+
+# Categorical dtype of the station ids; its integer codes are the station codes.
+def station_dtype():
+    return _registry()[1]
+
+
+# Integer codes of a sequence of station ids (-1 for stations that are not in the metadata).
+def codes(station_ids):
+    values = pd.Series(station_ids).map(store.normalize_station_id)
+    return pd.Categorical(values, dtype=station_dtype()).codes.astype(np.int16)
+
+
+# Returns 'df' with its station id column turned into the station categorical (see 'station_dtype').
+def with_codes(df, column='station_id'):
+    df = df.copy()
+    df[column] = df[column].astype(str).map(store.normalize_station_id).astype(station_dtype())
+    return df
+
+
+# The stations present in a table: from the file names for the per-site tables, else from its rows.
+def _stations_in(table):
+    if table in store.SITE_TABLES:
+        return set(store.stations_with_data(table))
+    return set(store.load_table(table, columns=['station_id'])['station_id'].map(store.normalize_station_id))
+
+
+# The stations marked data_available == YES that have data in every one of 'tables', in station id order.
+# Example: discover_sites('et_monthly') gives the sites with an ET file.
+def discover_sites(*tables):
+    records = _registry()[0]
+    sites = [station_id for station_id, record in records.items()
+             if str(record['data_available']).strip().upper() == 'YES']
+    for table in tables:
+        found = _stations_in(table)
+        sites = [site for site in sites if site in found]
+    return sites
@@ -0,0 +1,147 @@
+# Batched regression and correlation statistics.
+# Instead of filtering a DataFrame once per group and calling np.polyfit / stats.pearsonr /
+# stats.kendalltau on each piece, every group is handled in one pass:
+#   - least squares slope/intercept and Pearson r/p come from closed form formulas on per group sums
+#   - Kendall's tau/p uses scipy's O(n log n) implementation once per group
+#
+# The regression line can be an ordinary least squares fit (the default), a Theil-Sen (Sen's slope)
+# fit that is robust to outliers, or a weighted least squares fit (e.g. weighted by PIXEL_COUNT).
+import numpy as np
+import pandas as pd
+from scipy import special
+from scipy import stats
+
+STAT_COLUMNS = ['slope', 'intercept', 'pearson_r', 'pearson_p', 'kendall_tau', 'kendall_p', 'n']
+
+# Regression fits understood by 'correlation_stats'.
+FITS = ['ols', 'theil_sen', 'weighted']
+FIT_NAMES = {'ols': 'Least squares', 'theil_sen': 'Theil-Sen', 'weighted': 'Weighted least squares'}
+
+
+# Puts 'df' into long form with one (x, y) pair per row and an 'x_var' column naming the x variable.
+# Rows where either value is missing are dropped.
+# If 'weight_col' is given its values are added as a 'w' column (a missing weight counts as 0).
+def _long_pairs(df, x_vars, y_var, by, weight_col=None):
+    list_of_dfs = []
+    for x_var in x_vars:
+        df_pairs = df[list(by)].copy()
+        df_pairs['x_var'] = x_var
+        df_pairs['x'] = df[x_var].to_numpy(dtype=float)
+        df_pairs['y'] = df[y_var].to_numpy(dtype=float)
+        if weight_col is not None:
+            df_pairs['w'] = np.nan_to_num(df[weight_col].to_numpy(dtype=float))
+        list_of_dfs.append(df_pairs.dropna(subset=['x', 'y']))
+    return pd.concat(list_of_dfs, ignore_index=True)
+
+
+# Theil-Sen fit of every group: the slope is the median of the slopes between all pairs of points
+# (pairs with the same x are left out) and the intercept is median(y) - slope * median(x), the same
+# as scipy.stats.theilslopes.
+# Groups with the same number of points are stacked into one array, so the pairwise slopes of all of
+# them come from a single NumPy expression. 'codes' numbers the group of every point (0, 1, 2, ...).
+# Returns (slope, intercept) arrays with one value per group.
+def theil_sen(x, y, codes):
+    order = np.argsort(codes, kind='stable')
+    x, y = np.asarray(x, dtype=float)[order], np.asarray(y, dtype=float)[order]
+    counts = np.bincount(codes)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+    slope = np.full(len(counts), np.nan)
+    intercept = np.full(len(counts), np.nan)
+    for n in np.unique(counts):
+        if n < 2:
+            continue
+        groups = np.flatnonzero(counts == n)
+        index = starts[groups][:, None] + np.arange(n)
+        x_group, y_group = x[index], y[index]
+        i, j = np.triu_indices(n, 1)
+        dx = x_group[:, j] - x_group[:, i]
+        dy = y_group[:, j] - y_group[:, i]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            pair_slopes = np.where(dx != 0, dy / dx, np.nan)
+        all_tied = np.isnan(pair_slopes).all(axis=1)
+        pair_slopes[all_tied] = 0
+        group_slope = np.nanmedian(pair_slopes, axis=1)
+        group_slope[all_tied] = np.nan
+        slope[groups] = group_slope
+        intercept[groups] = np.median(y_group, axis=1) - group_slope * np.median(x_group, axis=1)
+    return slope, intercept
+
+
+# Weighted least squares fit of every group from weighted group sums.
+# Returns (slope, intercept) Series indexed by the group keys.
+def weighted_fit(df_pairs, keys):
+    df_pairs = df_pairs.assign(wx=df_pairs['w'] * df_pairs['x'], wy=df_pairs['w'] * df_pairs['y'])
+    grouped = df_pairs.groupby(keys, sort=True, observed=True)
+    sum_w = grouped['w'].transform('sum')
+    dx = df_pairs['x'] - grouped['wx'].transform('sum') / sum_w
+    dy = df_pairs['y'] - grouped['wy'].transform('sum') / sum_w
+    df_pairs = df_pairs.assign(wdxx=df_pairs['w'] * dx * dx, wdxy=df_pairs['w'] * dx * dy)
+
+    df_sums = df_pairs.groupby(keys, sort=True, observed=True).agg(
+        w=('w', 'sum'), wx=('wx', 'sum'), wy=('wy', 'sum'), wdxx=('wdxx', 'sum'), wdxy=('wdxy', 'sum'))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slope = df_sums['wdxy'] / df_sums['wdxx']
+        intercept = df_sums['wy'] / df_sums['w'] - slope * df_sums['wx'] / df_sums['w']
+    return slope, intercept
+
+
+# Two sided p-value of Pearson's r for samples of size n.
+# Same exact beta distribution that scipy.stats.pearsonr uses, evaluated for all groups at once.
+def pearson_p_value(r, n):
+    r = np.asarray(r, dtype=float)
+    n = np.asarray(n, dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        a = n / 2 - 1
+        p = 2 * special.betainc(a, a, (1 - np.abs(r)) / 2)
+    return np.where(n > 2, np.clip(p, 0, 1), np.nan)
+
+
+# Regression (y = slope * x + intercept) and correlation stats of y against x for every group.
+# 'x_vars' can be one column name or a list of them; each one is paired with 'y_var'.
+# 'fit' picks how the slope and intercept are found (one of FITS); the 'weighted' fit weights every
+# point by its 'weight_col' value. The correlations are the same whatever the fit.
+# Returns a DataFrame indexed by the 'by' columns plus 'x_var' with the columns in STAT_COLUMNS.
+def correlation_stats(df, x_vars, y_var, by, fit='ols', weight_col='PIXEL_COUNT'):
+    if fit not in FITS:
+        raise ValueError('Unknown fit: ' + str(fit) + ' (use one of ' + ', '.join(FITS) + ')')
+    if isinstance(x_vars, str):
+        x_vars = [x_vars]
+    keys = list(by) + ['x_var']
+    df_pairs = _long_pairs(df, x_vars, y_var, by, weight_col if fit == 'weighted' else None)
+    grouped = df_pairs.groupby(keys, sort=True, observed=True)
+
+    # Center x and y on their group means, then every remaining quantity is a group sum.
+    df_pairs['dx'] = df_pairs['x'] - grouped['x'].transform('mean')
+    df_pairs['dy'] = df_pairs['y'] - grouped['y'].transform('mean')
+    df_pairs['dxx'] = df_pairs['dx'] * df_pairs['dx']
+    df_pairs['dyy'] = df_pairs['dy'] * df_pairs['dy']
+    df_pairs['dxy'] = df_pairs['dx'] * df_pairs['dy']
+    grouped = df_pairs.groupby(keys, sort=True, observed=True)
+    df_sums = grouped.agg(n=('x', 'size'), mean_x=('x', 'mean'), mean_y=('y', 'mean'),
+                          sxx=('dxx', 'sum'), syy=('dyy', 'sum'), sxy=('dxy', 'sum'))
+
+    df_stats = pd.DataFrame(index=df_sums.index)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        df_stats['slope'] = df_sums['sxy'] / df_sums['sxx']
+        df_stats['intercept'] = df_sums['mean_y'] - df_stats['slope'] * df_sums['mean_x']
+        df_stats['pearson_r'] = (df_sums['sxy'] / np.sqrt(df_sums['sxx'] * df_sums['syy'])).clip(-1, 1)
+    df_stats['pearson_p'] = pearson_p_value(df_stats['pearson_r'], df_sums['n'])
+
+    if fit == 'theil_sen':
+        codes = grouped.ngroup().to_numpy()
+        df_stats['slope'], df_stats['intercept'] = theil_sen(df_pairs['x'], df_pairs['y'], codes)
+    elif fit == 'weighted':
+        df_stats['slope'], df_stats['intercept'] = weighted_fit(df_pairs, keys)
+
+    tau = []
+    tau_p = []
+    for _, df_group in grouped:
+        result = stats.kendalltau(df_group['y'].to_numpy(), df_group['x'].to_numpy())
+        tau.append(result[0])
+        tau_p.append(result[1])
+    df_stats['kendall_tau'] = tau
+    df_stats['kendall_p'] = tau_p
+    df_stats['n'] = df_sums['n']
+
+    return df_stats[STAT_COLUMNS]
@@ -0,0 +1,293 @@
+# Shared columnar data store.
+# The raw csv/xlsx files live once in '<repo>/raw_data'. The ingest step converts them into typed
+# parquet files in '<repo>/data_store' (one file per station for the per-site data), and the
+# load_* functions below are what every task script reads from. A store file is rebuilt whenever
+# its raw file is newer than it, so editing or adding a raw file is picked up on the next load.
+#
+# Every store file is read from disk once per process and then served from memory (until the file
+# changes), so tasks that run one after the other in one process (see 'ucrb/cli.py') share what they
+# load. Set UCRB_MEMORY_CACHE=0 to always read from disk.
+#
+# Run 'python -m ucrb.store' to ingest everything up front.
+import os
+import glob
+import shutil
+import pandas as pd
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RAW_DATA_DIR = os.environ.get('UCRB_RAW_DATA', os.path.join(REPO_DIR, 'raw_data'))
+STORE_DIR = os.environ.get('UCRB_STORE', os.path.join(REPO_DIR, 'data_store'))
+
+# Bump this whenever a reader below changes the layout or types of a table.
+# A store written by another version is thrown away and rebuilt on the next load.
+STORE_VERSION = 2
+
+# Tables with one raw file per station.
+# Name of the table in the store -> (folder in raw_data, suffix after the station id)
+SITE_TABLES = {
+    'flow_monthly': ('flow', '_monthly_summary.csv'),
+    'flow_daily': ('flow', '_daily.csv'),
+    'et_monthly': ('ucrb_riparain_et', '_EEMETRIC_monthly_et_etof.csv'),
+}
+
+# Tables with one raw file holding every station.
+# Name of the table in the store -> file in raw_data
+SHARED_TABLES = {
+    'metadata': 'metadata.csv',
+    'riparian_means': 'ucrc_riparian_means.xlsx',
+    'pr_means': 'ucrc_cda_pr_means.xlsx',
+    'growing_season': 'growing_season_et_and_flow.csv',
+}
+
+
+# Bug notice: Some of the data recieved, had the leading '0' truncated off the front.
+# For example '09180000' --> '9180000'
+# Every station id that goes into the store is zero padded back to at least 8 digits.
+def normalize_station_id(station_id):
+    station_id = str(station_id).strip()
+    if station_id.isdigit():
+        return station_id.zfill(8)
+    return station_id
+
+
+def _normalize_station_ids(df):
+    df['station_id'] = df['station_id'].map(normalize_station_id)
+    return df
+
+
+def _read_metadata(path):
+    df = pd.read_csv(path, index_col=0, dtype={'station_id': str})
+    return _normalize_station_ids(df)
+
+
+# Dates are parsed here, once, with explicit formats so the tasks never have to parse them again.
+def _read_flow_monthly(path):
+    df = pd.read_csv(path, dtype={'date': str})
+    df['date'] = pd.to_datetime(df['date'], format='%Y-%m')
+    df['year'] = df['year'].astype('int16')
+    df['month'] = df['month'].astype('int8')
+    return df
+
+
+def _read_flow_daily(path):
+    df = pd.read_csv(path, usecols=['date', 'year', 'month', 'day', 'discharge_cfs'], dtype={'date': str})
+    df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d')
+    df['year'] = df['year'].astype('int16')
+    df['month'] = df['month'].astype('int8')
+    df['day'] = df['day'].astype('int8')
+    return df
+
+
+# The year and month of each record are taken from its END_DATE.
+def _read_et_monthly(path):
+    df = pd.read_csv(path, dtype={'START_DATE': str, 'END_DATE': str})
+    df['START_DATE'] = pd.to_datetime(df['START_DATE'], format='%Y-%m-%d')
+    df['END_DATE'] = pd.to_datetime(df['END_DATE'], format='%Y-%m-%d')
+    df['year'] = df['END_DATE'].dt.year.astype('int16')
+    df['month'] = df['END_DATE'].dt.month.astype('int8')
+    return df
+
+
+def _read_yearly_xlsx(path):
+    df = pd.read_excel(path)
+    df['year'] = df['year'].astype('int16')
+    return _normalize_station_ids(df)
+
+
+def _read_growing_season(path):
+    df = pd.read_csv(path, index_col=0)
+    df['year'] = df['year'].astype('int16')
+    return _normalize_station_ids(df)
+
+
+READERS = {
+    'metadata': _read_metadata,
+    'flow_monthly': _read_flow_monthly,
+    'flow_daily': _read_flow_daily,
+    'et_monthly': _read_et_monthly,
+    'riparian_means': _read_yearly_xlsx,
+    'pr_means': _read_yearly_xlsx,
+    'growing_season': _read_growing_season,
+}
+
+
+# Returns the (raw file, store file) pair for a table.
+# 'site' must be given for the per-site tables and left out for the shared ones.
+def table_paths(table, site=None):
+    if table in SITE_TABLES:
+        folder, suffix = SITE_TABLES[table]
+        return (os.path.join(RAW_DATA_DIR, folder, site + suffix),
+                os.path.join(STORE_DIR, table, site + '.parquet'))
+    return (os.path.join(RAW_DATA_DIR, SHARED_TABLES[table]),
+            os.path.join(STORE_DIR, table + '.parquet'))
+
+
+def _is_stale(src, dst):
+    if not os.path.exists(src):
+        return False
+    return not os.path.exists(dst) or os.stat(src).st_mtime_ns > os.stat(dst).st_mtime_ns
+
+
+# Converts one raw file into its store file.
+# The parquet file is written to a temporary name first so that a reader never sees half a file.
+def _ingest_file(table, src, dst, site=None):
+    df = READERS[table](src)
+    if site is not None:
+        df.insert(0, 'station_id', site)
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    tmp = dst + '.' + str(os.getpid()) + '.tmp'
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, dst)
+
+
+# Throws the store away if it was written by a different STORE_VERSION.
+# Only what the store writes itself is removed (see '_store_entries'); anything else in the folder
+# is left alone. A folder that is not empty but has no VERSION file is not a store, and is never
+# written into. Only checked once per process.
+_version_checked = False
+
+
+# The paths in the store folder that the store writes: the folders of the per-site tables, the
+# shared table files, the cache folder (see 'ucrb/cache.py') and the VERSION file.
+def _store_entries():
+    entries = [os.path.join(STORE_DIR, table) for table in SITE_TABLES]
+    entries += glob.glob(os.path.join(STORE_DIR, '*.parquet'))
+    return entries + [os.path.join(STORE_DIR, 'cache'), os.path.join(STORE_DIR, 'VERSION')]
+
+
+def _check_version():
+    global _version_checked
+    if _version_checked:
+        return
+    version_file = os.path.join(STORE_DIR, 'VERSION')
+    if os.path.isdir(STORE_DIR) and os.listdir(STORE_DIR):
+        if not os.path.exists(version_file):
+            raise RuntimeError('Not a data store (no VERSION file), refusing to write into it: ' + STORE_DIR +
+                               ' (point UCRB_STORE at an empty or new folder)')
+        if open(version_file).read().strip() != str(STORE_VERSION):
+            for path in _store_entries():
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                elif os.path.exists(path):
+                    os.remove(path)
+    if not os.path.exists(version_file):
+        os.makedirs(STORE_DIR, exist_ok=True)
+        with open(version_file, 'w') as f:
+            f.write(str(STORE_VERSION))
+    _version_checked = True
+
+
+# Store file -> (mtime, size, DataFrame with every column)
+_memory_cache = {}
+
+
+def _memory_cache_enabled():
+    return os.environ.get('UCRB_MEMORY_CACHE') != '0'
+
+
+# Reads a store file, from memory if it was already read and has not changed since.
+# The whole file is kept, so any selection of its columns can be served from it.
+# The caller gets its own copy, so modifying it does not change the cached frame.
+def _read(dst, columns=None):
+    if not _memory_cache_enabled():
+        return pd.read_parquet(dst, columns=columns)
+    st = os.stat(dst)
+    cached = _memory_cache.get(dst)
+    if cached is None or cached[:2] != (st.st_mtime_ns, st.st_size):
+        cached = (st.st_mtime_ns, st.st_size, pd.read_parquet(dst))
+        _memory_cache[dst] = cached
+    df = cached[2]
+    return (df if columns is None else df[list(columns)]).copy()
+
+
+def _load(table, site=None, columns=None):
+    _check_version()
+    src, dst = table_paths(table, site)
+    if _is_stale(src, dst):
+        _ingest_file(table, src, dst, site)
+    if not os.path.exists(dst):
+        raise FileNotFoundError('No raw data or store file for ' + table + (' ' + site if site else '') + ': ' + src)
+    return _read(dst, columns)
+
+
+# Empties the in-memory copies of the store files (the files on disk are left alone).
+def clear_memory():
+    _memory_cache.clear()
+
+
+# Lists the stations that have a raw file (or an already ingested store file) for a per-site table.
+def stations_with_data(table):
+    folder, suffix = SITE_TABLES[table]
+    sites = set()
+    for path in glob.glob(os.path.join(RAW_DATA_DIR, folder, '*' + suffix)):
+        sites.add(os.path.basename(path)[:-len(suffix)])
+    for path in glob.glob(os.path.join(STORE_DIR, table, '*.parquet')):
+        sites.add(os.path.basename(path)[:-len('.parquet')])
+    return sorted(sites)
+
+
+# Converts every raw file that is newer than its store file (or all of them if 'force' is set).
+def ingest(force=False):
+    _check_version()
+    converted = []
+    for table in SITE_TABLES:
+        for site in stations_with_data(table):
+            src, dst = table_paths(table, site)
+            if os.path.exists(src) and (force or _is_stale(src, dst)):
+                _ingest_file(table, src, dst, site)
+                converted.append(dst)
+    for table in SHARED_TABLES:
+        src, dst = table_paths(table)
+        if os.path.exists(src) and (force or _is_stale(src, dst)):
+            _ingest_file(table, src, dst)
+            converted.append(dst)
+    return converted
+
+
+#######################################################
+# Loader API
+
+def load_metadata():
+    return _load('metadata')
+
+
+def load_flow_monthly(site, columns=None):
+    return _load('flow_monthly', site, columns)
+
+
+def load_flow_daily(site, columns=None):
+    return _load('flow_daily', site, columns)
+
+
+def load_et_monthly(site, columns=None):
+    return _load('et_monthly', site, columns)
+
+
+def load_riparian_means():
+    return _load('riparian_means')
+
+
+def load_pr_means():
+    return _load('pr_means')
+
+
+# Growing season ET and flow per site and year.
+# This table is produced by the csv step of task 4 (see 'ucrb/tasks/task4.py').
+def load_growing_season():
+    return _load('growing_season')
+
+
+# Loads a per-site table for several sites and stacks them into one DataFrame.
+def load_sites(table, sites, columns=None):
+    return pd.concat([_load(table, site, columns) for site in sites], ignore_index=True)
+
+
+# Loads any table of the store by its name (a key of SITE_TABLES or SHARED_TABLES), e.g.
+# load_table('pr_means', columns=['station_id']). 'site' must be given for the per-site tables.
+def load_table(table, site=None, columns=None):
+    return _load(table, site, columns)
+
+
+if __name__ == '__main__':
+    for path in ingest(force=True):
+        print('Wrote ' + os.path.relpath(path, REPO_DIR))
@@ -0,0 +1,133 @@
+# The seven tasks as importable modules ('ucrb.tasks.task1' ... 'ucrb.tasks.task7').
+# Every task module has:
+#   DESCRIPTION            one line about what it makes
+#   add_arguments(parser)  adds its command line options to an argparse parser
+#   run(args)              does the work for the parsed options
+#   main(argv=None)        parses 'argv' and runs; the scripts in the task folders just call this
+# Nothing is loaded or computed when a task module is imported. Bokeh, matplotlib and seaborn (and
+# the ucrb modules built on them: layout, dashboard and heatmaps) are only imported inside the
+# functions that draw, so a run that only makes stats or tables never pays for them.
+#
+# The tasks can be run one after the other in one process with 'ucrb run' (see 'ucrb/cli.py'); the
+# store, the joins and the station registry are kept in memory, so they are loaded only once.
+#
+# The outputs go into the task folders of the repository ('<repo>/task_N_...'), or into the task
+# folders under UCRB_OUTPUT if it is set.
+import argparse
+import importlib
+import os
+
+from ucrb import export, instrument, store
+
+# Task name -> folder its outputs are written to
+TASKS = {
+    'task1': 'task_1_Monthly_Box_Plots_by_Site',
+    'task2': 'task_2_Table_of_Mean_Monthly_Rates_with_Std_Deviation_(ET_and_EToF)',
+    'task3': 'task_3_Monthly_Median_&_Q25_CFS_vs_EToF_plots',
+    'task4': 'task_4_Growing_Season_Mean_Flow_Plots',
+    'task5': 'task_5_Normalized_Growing_Season_Mean_Flow_Plot',
+    'task6': 'task_6_Growing_Season_Flow_vs_annual_or_water_year_precipitation',
+    'task7': 'task_7_Correlation_Matrix_Plots',
+}
+
+
+def output_root():
+    return os.environ.get('UCRB_OUTPUT', store.REPO_DIR)
+
+
+def task_dir(name):
+    return os.path.join(output_root(), TASKS[name])
+
+
+def load_task(name):
+    if name not in TASKS:
+        raise ValueError('Unknown task: ' + name + ' (one of ' + ', '.join(TASKS) + ')')
+    return importlib.import_module('ucrb.tasks.' + name)
+
+
+# Options that mean the same in every task that has them. When several tasks run together, these
+# go to every task that takes them (see 'ucrb/cli.py').
+SHARED_OPTIONS = ['-h', '--help', '--sites', '--formats']
+
+
+# Options that take a list accept it space or comma separated: '--vars a b' or '--vars a,b'.
+def split_list(values):
+    if values is None:
+        return None
+    return [value for item in values for value in item.split(',') if value]
+
+
+# argparse type of the options that need a whole number of at least 1.
+# A bad value is reported by argparse itself, with the usage of the task.
+def positive_int(value):
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError('not a whole number: ' + value)
+    if number < 1:
+        raise argparse.ArgumentTypeError('must be at least 1: ' + value)
+    return number
+
+
+def add_sites_argument(parser):
+    parser.add_argument('--sites', nargs='+', metavar='STATION_ID',
+                        help='only use these stations (default: every station with data)')
+
+
+def add_formats_argument(parser):
+    parser.add_argument('--formats', nargs='+', default=['xlsx'], metavar='FORMAT',
+                        help='formats to write the tables in: xlsx, parquet and/or csv (default: xlsx)')
+
+
+# The table formats asked for with '--formats' (see 'ucrb/export.py').
+def select_formats(requested):
+    formats = split_list(requested)
+    unknown = [fmt for fmt in formats if fmt not in export.FORMATS]
+    if unknown:
+        print("ERROR: UNKNOWN FORMATS: " + ', '.join(unknown) + ' (one of ' + ', '.join(export.FORMATS) + ')')
+        exit(1)
+    return formats
+
+
+# The stations of 'available' that were asked for with '--sites', in the order of 'available'.
+# Station ids may be given without their leading '0'.
+def select_sites(available, requested):
+    requested = split_list(requested)
+    if not requested:
+        return available
+    requested = [store.normalize_station_id(site) for site in requested]
+    unknown = [site for site in requested if site not in available]
+    if unknown:
+        print("ERROR: NO DATA FOR SITES: " + ', '.join(unknown))
+        exit(1)
+    return [site for site in available if site in requested]
+
+
+def make_parser(name, prog=None):
+    module = load_task(name)
+    parser = argparse.ArgumentParser(prog=prog, description='Task ' + name[len('task'):] + ': ' + module.DESCRIPTION)
+    module.add_arguments(parser)
+    return parser
+
+
+# The option strings (e.g. '--sites') of a task.
+def task_options(name):
+    return [option for action in make_parser(name)._actions for option in action.option_strings]
+
+
+# Runs one task with parsed options. Its stage records (see 'ucrb/instrument.py') are named after it.
+def run_task(name, args):
+    instrument.set_task(name)
+    load_task(name).run(args)
+
+
+# matplotlib's pyplot with the headless Agg backend: the tasks only ever write files.
+def pyplot():
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def main(name, argv=None):
+    run_task(name, make_parser(name).parse_args(argv))
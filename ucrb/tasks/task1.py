@@ -0,0 +1,160 @@
+# Task 1
+import os
+
+from ucrb import boxplots, build, instrument, months, output, runner, stations, store, tasks
+
+DESCRIPTION = 'monthly ET and EToF box plots by site.'
+
+# Outputs are written into the task's folder, whatever the working directory is.
+TASK_DIR = tasks.task_dir('task1')
+
+# The 2 box plots drawn for every site: (column, title)
+PLOT_VARS = [('ET_MEAN', 'ET'), ('EToF_MEAN', 'EToF')]
+
+COMBINED_PATH = os.path.join(TASK_DIR, 'Et_vs_EToF__Monthly_Box_Plots_by_Site.png')
+PDF_PATH = os.path.join(TASK_DIR, 'Et_vs_EToF__Monthly_Box_Plots_by_Site.pdf')
+SITE_PLOTS_DIR = os.path.join(TASK_DIR, 'plots')
+
+
+# Read in the metadata so that the site names can be attached to the graph.
+def load_site_names():
+    try:
+        return stations.site_names()
+    except:
+        print("ERROR WITH READING METADATA")
+        exit(1)
+
+
+# Reads the ET data of the given sites and computes the box statistics of every site, month and
+# variable in one pass. Returns {column: DataFrame indexed by (station_id, month)}.
+def load_box_stats(sites):
+    with instrument.stage('load') as record:
+        try:
+            df_et = store.load_sites('et_monthly', sites, columns=['station_id', 'month', 'ET_MEAN', 'EToF_MEAN'])
+        except:
+            print("ERROR WHEN READING DATA FROM SITES: " + ', '.join(sites))
+            exit(1)
+        instrument.count(record, df_et)
+
+    with instrument.stage('compute', rows=len(df_et)):
+        return {var: boxplots.box_stats(df_et, var, ['station_id', 'month']) for var, _ in PLOT_VARS}
+
+
+# Draws the ET and EToF box plots of one site onto a pair of axes.
+# Months without data are left empty; the month number (taken from END_DATE by the store) is
+# shown as its name. Example: 1 --> 'Jan'
+def draw_site(axes, site, site_name, box_stats):
+    for ax, (var, title) in zip(axes, PLOT_VARS):
+        df_site = box_stats[var].loc[site]
+        boxplots.draw(ax, df_site, [months.MONTH_NAMES[m - 1] for m in df_site.index],
+                      positions=[m - 1 for m in df_site.index])
+        ax.set_xlim(-0.5, 11.5)
+        ax.set_xticks(range(12), months.MONTH_NAMES)
+        ax.set(title=title + ' at ' + site_name + ' - ' + site, xlabel='Month', ylabel=var)
+
+
+# All sites in one tall image (2 plots per row), the original output of this task.
+def make_combined(sites, site_names, box_stats, path):
+    plt = tasks.pyplot()
+    with instrument.stage('render', rows=len(sites)):
+        fig, axes = plt.subplots(len(sites), 2, figsize=(20, 10 * len(sites)), squeeze=False)
+        fig.subplots_adjust(top=.95)
+        fig.subplots_adjust(bottom=0.02)
+        fig.suptitle(fontsize=50, t='Et vs. EToF - Monthly Box Plots by Site ')
+
+        for i, site in enumerate(sites):
+            draw_site(axes[i], site, site_names[site], box_stats)
+
+    with instrument.stage('write'):
+        fig.savefig(path)
+        plt.close(fig)
+
+
+# One image per site, saved into 'plots/<site>_Et_vs_EToF__Monthly_Box_Plots.png'.
+# Runs on its own in a worker process (see 'ucrb/runner.py'), so it loads its own data.
+def make_site_image(site, site_names):
+    plt = tasks.pyplot()
+    box_stats = load_box_stats([site])
+
+    with instrument.stage('render', site):
+        fig, axes = plt.subplots(1, 2, figsize=(20, 8))
+        fig.suptitle(fontsize=20, t='Et vs. EToF - Monthly Box Plots - ' + site_names[site] + ' - ' + site)
+        draw_site(axes, site, site_names[site], box_stats)
+
+    path = site_image_path(site)
+    with instrument.stage('write', site):
+        fig.savefig(path)
+        plt.close(fig)
+    return path
+
+
+def site_image_path(site):
+    return os.path.join(SITE_PLOTS_DIR, site + '_Et_vs_EToF__Monthly_Box_Plots.png')
+
+
+# All sites in a PDF with 'sites_per_page' sites (rows of 2 plots) on every page.
+def make_pdf(sites, site_names, box_stats, path, sites_per_page):
+    plt = tasks.pyplot()
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    with PdfPages(path) as pdf:
+        for start in range(0, len(sites), sites_per_page):
+            page_sites = sites[start:start + sites_per_page]
+            with instrument.stage('render', rows=len(page_sites)):
+                fig, axes = plt.subplots(sites_per_page, 2, figsize=(20, 8 * sites_per_page), squeeze=False)
+                fig.suptitle(fontsize=30, t='Et vs. EToF - Monthly Box Plots by Site ')
+                for i, site in enumerate(page_sites):
+                    draw_site(axes[i], site, site_names[site], box_stats)
+                for ax in axes[len(page_sites):].ravel():
+                    ax.set_visible(False)
+            with instrument.stage('write'):
+                pdf.savefig(fig)
+                plt.close(fig)
+
+
+def add_arguments(parser):
+    parser.add_argument('--mode', choices=['combined', 'sites', 'pdf'], default='combined',
+                        help='combined: one tall png with every site (default); '
+                             'sites: one png per site, made in parallel (see UCRB_WORKERS); '
+                             'pdf: every site in a pdf with a few sites per page')
+    parser.add_argument('--sites-per-page', type=tasks.positive_int, default=3, help='sites on every pdf page (default 3)')
+    tasks.add_sites_argument(parser)
+
+
+def run(args):
+    # The sites with ET data that the metadata marks as available, as zero padded station ids
+    # (see 'ucrb/stations.py').
+    site_list = tasks.select_sites(stations.discover_sites('et_monthly'), args.sites)
+
+    site_names = load_site_names()
+    # Every output is only made again when its inputs or the code changed since it was last made
+    # (see 'ucrb/build.py'). Set UCRB_FORCE=1 to always make them.
+    metadata_path = store.table_paths('metadata')[0]
+
+    if args.mode == 'sites':
+        output.ensure_dir(SITE_PLOTS_DIR)
+        inputs = {site: [store.table_paths('et_monthly', site)[0], metadata_path] for site in site_list}
+        stale_sites = [site for site in site_list
+                       if not build.up_to_date([site_image_path(site)], inputs[site], __file__)]
+        runner.run_sites(make_site_image, stale_sites, site_names)
+        for site in stale_sites:
+            build.record([site_image_path(site)], inputs[site], __file__)
+        return
+
+    path = COMBINED_PATH if args.mode == 'combined' else PDF_PATH
+    inputs = [store.table_paths('et_monthly', site)[0] for site in site_list] + [metadata_path]
+    extra = args.sites_per_page if args.mode == 'pdf' else None
+    if build.up_to_date([path], inputs, __file__, extra):
+        print('Up to date: ' + path)
+        return
+
+    box_stats = load_box_stats(site_list)
+    if args.mode == 'combined':
+        make_combined(site_list, site_names, box_stats, path)
+    else:
+        make_pdf(site_list, site_names, box_stats, path, args.sites_per_page)
+    build.record([path], inputs, __file__, extra)
+
+
+def main(argv=None):
+    tasks.main('task1', argv)
@@ -0,0 +1,93 @@
+# Task 2
+import os
+import pandas as pd
+
+from ucrb import aggregate, build, export, instrument, months, stations, store, tasks
+
+DESCRIPTION = 'table of the mean monthly ET and EToF with their standard deviation.'
+
+# Outputs are written into the task's folder, whatever the working directory is.
+TASK_DIR = tasks.task_dir('task2')
+
+# The tables go to '<stem>.xlsx', and with '--formats' also '.parquet' and '.csv' (see 'ucrb/export.py').
+OUTPUT_STEM = os.path.join(TASK_DIR, 'table_of_mean_monthly_rates_with_std_deviation')
+
+# The variables in the table, each on a sheet of its own: (column, title)
+TABLE_VARS = [('ET_MEAN', 'Monthly ET Rates (mm/month)'), ('EToF_MEAN', 'Monthly EToF (unitless)')]
+
+# The statistics in the table, with the names they are shown under.
+# More statistics (e.g. 'median', 'q25', 'count') can be added here.
+stat_names = {'mean': 'Mean', 'std': 'Standard Dev'}
+
+
+# Read in the metadata so that the site names can be attached to the graph.
+def load_site_names():
+    try:
+        return stations.site_names()
+    except:
+        print("ERROR WITH READING METADATA")
+        exit(1)
+
+
+# Reads the data in for every site and stacks it into one DataFrame
+def load_data(site_list):
+    with instrument.stage('load') as record:
+        list_of_dfs = []
+        for site in site_list:
+            try:
+                list_of_dfs.append(store.load_et_monthly(site))
+            except:
+                print("ERROR WHEN READING DATA FROM SITE: " + site)
+                exit(1)
+        return instrument.count(record, pd.concat(list_of_dfs, ignore_index=True))
+
+
+# Reshapes the stats of one variable into the table that is exported.
+# Rows are (site, statistic) in the order of 'site_list', with the station id, site name and statistic
+# in the first 3 columns, and the next 12 columns are the months.
+def make_table(df_stats, var, site_list, site_names):
+    df_table = df_stats[var].stack().unstack('month')
+    df_table = df_table.reindex(pd.MultiIndex.from_product([site_list, list(stat_names)]))
+    df_table.columns = [months.MONTH_NAMES[i - 1] for i in df_table.columns]
+    df_table.insert(0, 'site_name', [site_names[site] for site, _ in df_table.index])
+    df_table.insert(1, 'statistic', [stat_names[stat] for _, stat in df_table.index])
+    return df_table.droplevel(1).rename_axis('station_id').reset_index()
+
+
+def add_arguments(parser):
+    tasks.add_sites_argument(parser)
+    tasks.add_formats_argument(parser)
+
+
+def run(args):
+    # The sites with ET data that the metadata marks as available (see 'ucrb/stations.py').
+    site_list = tasks.select_sites(stations.discover_sites('et_monthly'), args.sites)
+    formats = tasks.select_formats(args.formats)
+    output_paths = export.table_paths(OUTPUT_STEM, formats)
+
+    # The table is only made again when its inputs or the code changed since it was last made
+    # (see 'ucrb/build.py'). Set UCRB_FORCE=1 to always make it.
+    inputs = [store.table_paths('et_monthly', site)[0] for site in site_list] + [store.table_paths('metadata')[0]]
+    if build.up_to_date(output_paths, inputs, __file__):
+        print('Up to date: ' + ', '.join(output_paths))
+        return
+
+    site_names = load_site_names()
+    df = load_data(site_list)
+
+    # Mean and standard dev. for every site and month, computed in a single groupby pass.
+    with instrument.stage('compute', rows=len(df)):
+        df_stats = aggregate.monthly_stats(df, ['ET_MEAN', 'EToF_MEAN'], stats=list(stat_names),
+                                           month_col='month').round(3)
+
+    with instrument.stage('compute', rows=len(df_stats)):
+        sheets = {var: (title, make_table(df_stats, var, site_list, site_names)) for var, title in TABLE_VARS}
+
+    # Write the 2 tables, one sheet each, in one pass (see 'ucrb/export.py').
+    with instrument.stage('write', rows=len(df_stats)):
+        export.write_tables(OUTPUT_STEM, sheets, formats)
+    build.record(output_paths, inputs, __file__)
+
+
+def main(argv=None):
+    tasks.main('task2', argv)
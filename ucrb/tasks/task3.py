@@ -0,0 +1,570 @@
+# Task 3
+import pandas as pd
+import os
+
+from ucrb import (build, datasets, export, instrument, months, output, plotting, resample, runner, stations, stats,
+                  store, tasks)
+
+DESCRIPTION = 'monthly median and Q25 flow vs. EToF plots and tables.'
+
+# Outputs are written into the task's folder, whatever the working directory is.
+TASK_DIR = tasks.task_dir('task3')
+
+# The 'cfs' variables of the monthly flow summaries that are compared against EToF by default.
+CFS_VARS = ['median_cfs', 'Q25_cfs']
+
+# Read in the metadata so that the site names can be attached to the graph.
+def load_site_names():
+    
+    try:
+        return stations.site_names()
+    except:
+        print("ERROR WITH READING METADATA")
+        exit(1)
+
+
+# Returns the flow and evap data of the given site, joined on year and month.
+# The join is done once and cached in memory and on disk ('data_store/cache', see 'ucrb/datasets.py');
+# it is only redone when one of the site's raw files changes, so the plots, stats and tables can all
+# call this freely.
+def load_raw_data_and_join(site):
+    with instrument.stage('join', site) as record:
+        try:
+            return instrument.count(record, datasets.monthly_flow_et(site))
+        except:
+            print("ERROR WHEN READING DATA FROM SITE: " + site)
+            exit(1)
+
+
+# The raw files that the outputs of one site are built from.
+def site_inputs(site):
+    return datasets.flow_et_sources(site)
+
+
+# The 3 plots of one site for the given 'cfs' variable.
+def site_plot_paths(plots_dir, site, cfs_var):
+    path = os.path.join(plots_dir, site + '_plots')
+    return [os.path.join(path, site + '_time_series__EToF_vs_' + cfs_var + '.html'),
+            os.path.join(path, site + '_scatter_plot__EToF_vs_' + cfs_var + '.html'),
+            os.path.join(path, site + '_monthly_scatter_plot__EToF_vs_' + cfs_var + '.html')]
+
+
+# Computes the regression and correlation stats of EToF against every 'cfs' variable,
+# once for each site (all months together) and once for each site and month.
+# The plots and the tables both read from these results so nothing is computed twice.
+# 'fit' is the regression line to use (see 'ucrb/stats.py'); 'weighted' weights every month by its PIXEL_COUNT.
+def compute_stats(site_list, cfs_vars, fit='ols'):
+    df_data = pd.concat([load_raw_data_and_join(site) for site in site_list], ignore_index=True)
+
+    with instrument.stage('compute', rows=len(df_data)):
+        df_site_stats = stats.correlation_stats(df_data, cfs_vars, 'EToF_MEAN', by=['station_id'], fit=fit)
+        df_monthly_stats = stats.correlation_stats(df_data, cfs_vars, 'EToF_MEAN', by=['station_id', 'month'],
+                                                   fit=fit)
+
+    return df_site_stats, df_monthly_stats
+
+
+# Builds the text of the stats label that goes on every scatter plot.
+# The fit is named on the label unless it is the default least squares line.
+def stats_label_text(row, fit='ols'):
+    fit_text = '' if fit == 'ols' else 'Fit: ' + stats.FIT_NAMES[fit] + '\n'
+    return fit_text + 'Slope: ' + str(round(row['slope'] * 1e4, 3)) + ' 1e-4' + '\n' + \
+           'Intercept: ' + str(round(row['intercept'], 3)) + '\n' + \
+           'Pearson r: ' + str(round(row['pearson_r'], 3)) + '\n' + \
+           'Pearson P-Value: ' + str(round(row['pearson_p'], 3)) + '\n' + \
+           'Kendall Tau: ' + str(round(row['kendall_tau'], 3)) + '\n' + \
+           'Kendall P-Value: ' + str(round(row['kendall_p'], 3)) + '\n' + \
+           'n: ' + str(int(row['n']))
+
+
+# Takes in a 'cfs' variable and compares it against EToF.
+# Makes 3 plots for each site.
+# Series, scatter, and a 4 * 3 monthly scatter plot.
+# The stats shown on the plots come from 'compute_stats'.
+# The sites are spread over worker processes by 'ucrb.runner' (see UCRB_WORKERS).
+def make_plots(site_list, cfs_var, df_site_stats, df_monthly_stats, fit='ols'):
+
+    site_names = load_site_names()
+
+    # Create a folder for 'plots'
+    plots_dir = output.ensure_dir(os.path.join(TASK_DIR, 'plots'))
+
+    # Only the sites whose raw files (or this code) changed since their plots were last made are redone.
+    # The stats of a site only depend on its own raw files, so they are not part of the check.
+    metadata_path = store.table_paths('metadata')[0]
+    stale_sites = [site for site in site_list
+                   if not build.up_to_date(site_plot_paths(plots_dir, site, cfs_var),
+                                           site_inputs(site) + [metadata_path], __file__, fit)]
+
+    runner.run_sites(make_site_plots, stale_sites, site_names, cfs_var, plots_dir, df_site_stats, df_monthly_stats,
+                     fit)
+
+    for site in stale_sites:
+        build.record(site_plot_paths(plots_dir, site, cfs_var), site_inputs(site) + [metadata_path], __file__, fit)
+
+
+# The data source of one plot document: only the columns the glyphs and hover tools use.
+# Every glyph of a document shares it, so the data is written into the HTML once. A Bokeh model can
+# only belong to one document, so each of the 3 plots of a site gets its own.
+def plot_source(df_data, cfs_var):
+    from bokeh.models import ColumnDataSource
+
+    return ColumnDataSource({
+        'START_DATE': df_data['START_DATE'],
+        'year': df_data['year'],
+        'month': df_data['month'].astype(str),
+        'EToF_MEAN': df_data['EToF_MEAN'],
+        cfs_var: df_data[cfs_var],
+    })
+
+
+# Makes the 3 plots of one site and saves them into '<plots_dir>/<site>_plots'.
+# Runs on its own in a worker process, so it loads everything it needs itself.
+def make_site_plots(site, site_names, cfs_var, plots_dir, df_site_stats, df_monthly_stats, fit='ols'):
+    from bokeh.layouts import gridplot
+    from bokeh.models import CDSView, GroupFilter, LinearAxis, Range1d
+    from bokeh.models.annotations import Label
+    from bokeh.models.tools import HoverTool
+    from bokeh.plotting import figure
+
+    site_name = site_names[site]
+    df_data = load_raw_data_and_join(site)
+
+    series_path, scatter_path, monthly_path = site_plot_paths(plots_dir, site, cfs_var)
+    output.ensure_dir(os.path.dirname(series_path))
+
+    #######################################################
+    # Series plot Configuration
+    with instrument.stage('render', site, rows=len(df_data)):
+        source = plot_source(df_data, cfs_var)
+        p = figure(x_axis_type="datetime", width=1500)
+        p.xgrid.grid_line_color = None
+        p.ygrid.grid_line_color = None
+        circle = p.circle(x='START_DATE', y=cfs_var,
+                 legend_label= cfs_var + ', Monthly (cfs)',
+                 source=source,
+                 color='blue', size=6)
+        p.line(x='START_DATE', y=cfs_var,
+               source=source,
+               color='blue')
+
+        p.extra_y_ranges = {"foo": Range1d(start=df_data['EToF_MEAN'].min() - 5, end=df_data['EToF_MEAN'].max() + 5)}
+        circle2 = p.circle(x='START_DATE', y='EToF_MEAN',
+                 source=source,
+                 y_range_name='foo',
+                 legend_label='EToF_MEAN, Monthly (mm/month)',  # idk if this is the right units
+                 color='green', size=6)
+        p.line(x='START_DATE', y='EToF_MEAN',
+               source=source,
+               y_range_name='foo',
+               color='green')
+
+        p.title.text = 'SITE: ' + site_name + ', ' + site + ' - EToF_MEAN vs. ' + cfs_var
+        p.xaxis.axis_label = 'Date'
+        p.yaxis.axis_label = cfs_var + ', Monthly (cfs)'
+        p.add_layout(LinearAxis(y_range_name="foo", axis_label='EToF_MEAN, Monthly (mm/month)'), 'right')
+
+        hover = HoverTool()
+        hover.renderers = [circle, circle2]
+        p.legend.click_policy = 'hide'
+        hover.tooltips = [
+            ('Year', '@year'),
+            ('Month', '@month'),
+            ('EToF_MEAN', '@EToF_MEAN'),
+            (cfs_var, '@' + cfs_var)
+        ]
+        p.add_tools(hover)
+
+    with instrument.stage('write', site):
+        output.save_html(p, series_path)
+
+    #######################################################
+    # Scatter plot Configuration
+
+    with instrument.stage('render', site, rows=len(df_data)):
+        p2 = figure(width=900, height=900)
+        p2.xgrid.grid_line_color = None
+        p2.ygrid.grid_line_color = None
+        circle3 = p2.circle(x=cfs_var, y='EToF_MEAN',
+                  source=plot_source(df_data, cfs_var),
+                  color='black', fill_color="#add8e6",
+                  size=8)
+
+        p2.title.text = 'SITE: ' + site_name + ', ' + site + ' - Flow vs. EToF'
+        p2.yaxis.axis_label = 'EToF_MEAN, Monthly (mm/month)'
+        p2.xaxis.axis_label = cfs_var + ', Monthly (cfs)'
+
+        # Draw the least-square regression line (see 'ucrb/plotting.py')
+        site_stats = df_site_stats.loc[(site, cfs_var)]
+        plotting.add_regression_line(p2, df_data[cfs_var], df_data['EToF_MEAN'],
+                                     site_stats['slope'], site_stats['intercept'], fit=fit,
+                                     weights=df_data['PIXEL_COUNT'] if fit == 'weighted' else None)
+
+        # The stats label to be added.
+        label = Label(x=620, y=70, x_units='screen', y_units='screen', text=stats_label_text(site_stats, fit))
+        p2.add_layout(label)
+
+        hover2 = HoverTool()
+        hover2.renderers = [circle3]
+        hover2.tooltips = [
+            ('Year', '@year'),
+            ('Month', '@month'),
+            ('EToF_MEAN', '@EToF_MEAN'),
+            (cfs_var, '@' + cfs_var)
+        ]
+        p2.add_tools(hover2)
+
+    with instrument.stage('write', site):
+        output.save_html(p2, scatter_path)
+
+    #######################################################
+    # Monthly scatter plot
+
+    with instrument.stage('render', site, rows=len(df_data)):
+        # The 12 panels share one source and each shows its month through a filtered view.
+        source = plot_source(df_data, cfs_var)
+        list_of_monthly_figs = []
+
+        for i in range(12):
+            df_monthly = df_data[df_data["month"] == months.MONTH_NAMES[i]]
+
+            p_month = figure(width=450, height=450)
+            p_month.xgrid.grid_line_color = None
+            p_month.ygrid.grid_line_color = None
+            circle4 = p_month.circle(x=cfs_var, y='EToF_MEAN',
+                           source=source,
+                           view=CDSView(filter=GroupFilter(column_name='month', group=months.MONTH_NAMES[i])),
+                           color='black', fill_color="#add8e6",
+                           size=8)
+
+            p_month.title.text = months.MONTH_NAMES[i] + ' - ' + site_name + ', ' + site
+            p_month.yaxis.axis_label = 'EToF_MEAN, Monthly (mm/month)'
+            p_month.xaxis.axis_label = cfs_var + ', Monthly (cfs)'
+
+            # Draw the least-square regression line (see 'ucrb/plotting.py')
+            month_stats = df_monthly_stats.loc[(site, months.MONTH_NAMES[i], cfs_var)]
+            plotting.add_regression_line(p_month, df_monthly[cfs_var], df_monthly['EToF_MEAN'],
+                                         month_stats['slope'], month_stats['intercept'], fit=fit,
+                                         weights=df_monthly['PIXEL_COUNT'] if fit == 'weighted' else None)
+
+            # The stats label to be added.
+            label = Label(x=255, y=20, x_units='screen', y_units='screen',
+                          text_font_size='8pt', text=stats_label_text(month_stats, fit))
+            p_month.add_layout(label)
+
+            hover3 = HoverTool()
+            hover3.renderers = [circle4]
+            hover3.tooltips = [
+                ('Year', '@year'),
+                ('EToF_MEAN', '@EToF_MEAN'),
+                (cfs_var, '@' + cfs_var)
+            ]
+            p_month.add_tools(hover3)
+
+            list_of_monthly_figs.append(p_month)
+
+    with instrument.stage('write', site):
+        output.save_html(gridplot([[list_of_monthly_figs[0], list_of_monthly_figs[1], list_of_monthly_figs[2], list_of_monthly_figs[3]],
+                                   [list_of_monthly_figs[4], list_of_monthly_figs[5], list_of_monthly_figs[6], list_of_monthly_figs[7]],
+                                   [list_of_monthly_figs[8], list_of_monthly_figs[9], list_of_monthly_figs[10],
+                                    list_of_monthly_figs[11]]]),
+                         monthly_path)
+
+
+#######################################################
+# Dashboard
+# One page ('plots/dashboard.html') with a site and a 'cfs' variable selector that shows the same
+# 3 plots as the files above. Only the first site's data is in the page; the others are loaded from
+# 'plots/dashboard_data/<site>.js' when they are selected (see 'ucrb/dashboard.py').
+
+# The regression line of 'row' over the x values that have an EToF, as ([x0, x1], [y0, y1]).
+def regression_line_points(row, df, cfs_var):
+    x = df.loc[df['EToF_MEAN'].notna(), cfs_var]
+    line_x, line_y = plotting.line_points(x, row['slope'], row['intercept'])
+    return line_x.tolist(), line_y.tolist()
+
+
+# Everything the dashboard shows for one site: the plotted columns and, for every 'cfs' variable,
+# the stats labels and regression lines of the scatter plot and of the 12 monthly plots.
+def site_payload(site, site_name, cfs_vars, df_site_stats, df_monthly_stats, fit='ols'):
+    df_data = load_raw_data_and_join(site)
+
+    columns = {
+        'START_DATE': list(df_data['START_DATE'].dt.as_unit('ms').astype('int64')),
+        'year': list(df_data['year'].astype(int)),
+        'month': list(df_data['month'].astype(str)),
+        'EToF_MEAN': list(df_data['EToF_MEAN'].astype(float)),
+    }
+    var_stats = {}
+    for cfs_var in cfs_vars:
+        columns[cfs_var] = list(df_data[cfs_var].astype(float))
+
+        site_stats = df_site_stats.loc[(site, cfs_var)]
+        line_x, line_y = regression_line_points(site_stats, df_data, cfs_var)
+        monthly = []
+        for month_name in months.MONTH_NAMES:
+            month_stats = df_monthly_stats.loc[(site, month_name, cfs_var)]
+            month_x, month_y = regression_line_points(month_stats, df_data[df_data['month'] == month_name], cfs_var)
+            monthly.append({'label': stats_label_text(month_stats, fit), 'line_x': month_x, 'line_y': month_y})
+        var_stats[cfs_var] = {'label': stats_label_text(site_stats, fit), 'line_x': line_x, 'line_y': line_y,
+                              'months': monthly}
+
+    return {'site': site, 'site_name': site_name, 'columns': columns, 'stats': var_stats}
+
+
+# The JS that puts a site's payload ('d') into the plots for the selected 'cfs' variable.
+DASHBOARD_SHOW_JS = '''
+const v = var_select.value;
+const c = d.columns;
+source.data = {START_DATE: c.START_DATE, year: c.year, month: c.month, EToF_MEAN: c.EToF_MEAN, flow: c[v]};
+const s = d.stats[v];
+scatter_line.data = {x: s.line_x, y: s.line_y};
+scatter_label.text = s.label;
+for (let i = 0; i < 12; i++) {
+    month_lines[i].data = {x: s.months[i].line_x, y: s.months[i].line_y};
+    month_labels[i].text = s.months[i].label;
+    month_titles[i].text = month_names[i] + ' - ' + d.site_name + ', ' + d.site;
+}
+series_title.text = 'SITE: ' + d.site_name + ', ' + d.site + ' - EToF_MEAN vs. ' + v;
+scatter_title.text = 'SITE: ' + d.site_name + ', ' + d.site + ' - Flow vs. EToF';
+for (const axis of flow_axes) {
+    axis.axis_label = v + ', Monthly (cfs)';
+}
+'''
+
+
+# Makes the dashboard page and the sidecar data files of every site.
+def make_dashboard(site_list, cfs_vars, df_site_stats, df_monthly_stats, fit='ols'):
+    plots_dir = os.path.join(TASK_DIR, 'plots')
+    page_path = os.path.join(plots_dir, 'dashboard.html')
+    data_dir = os.path.join(plots_dir, 'dashboard_data')
+    sidecar_paths = [os.path.join(data_dir, site + '.js') for site in site_list]
+
+    inputs = [path for site in site_list for path in site_inputs(site)] + [store.table_paths('metadata')[0]]
+    if build.up_to_date([page_path] + sidecar_paths, inputs, __file__, list(cfs_vars) + [fit]):
+        return
+
+    from bokeh.layouts import column, row
+    from bokeh.models import CDSView, ColumnDataSource, DataRange1d, GroupFilter, LinearAxis, Select
+    from bokeh.models.annotations import Label
+    from bokeh.models.tools import HoverTool
+    from bokeh.plotting import figure
+    from ucrb import dashboard, layout
+
+    site_names = load_site_names()
+
+    payloads = [site_payload(site, site_names[site], cfs_vars, df_site_stats, df_monthly_stats, fit)
+                for site in site_list]
+    with instrument.stage('write', rows=len(payloads)):
+        for site, payload, path in zip(site_list, payloads, sidecar_paths):
+            dashboard.write_sidecar(path, site, payload)
+
+    with instrument.stage('render'):
+        # The page starts out showing the first site and variable.
+        first = payloads[0]
+        cfs_var = cfs_vars[0]
+        columns = first['columns']
+        source = ColumnDataSource({
+            'START_DATE': pd.to_datetime(columns['START_DATE'], unit='ms'),
+            'year': columns['year'],
+            'month': columns['month'],
+            'EToF_MEAN': columns['EToF_MEAN'],
+            'flow': columns[cfs_var],
+        })
+        first_stats = first['stats'][cfs_var]
+
+        site_select = Select(title='Site', value=site_list[0],
+                             options=[(site, site + ' - ' + site_names[site]) for site in site_list])
+        var_select = Select(title='Variable', value=cfs_var, options=list(cfs_vars))
+
+        # Series plot
+        p = figure(x_axis_type="datetime", width=1500, height=500)
+        p.xgrid.grid_line_color = None
+        p.ygrid.grid_line_color = None
+        circle = p.circle(x='START_DATE', y='flow', legend_label='Flow, Monthly (cfs)', source=source,
+                          color='blue', size=6)
+        p.line(x='START_DATE', y='flow', source=source, color='blue')
+        p.extra_y_ranges = {"etof": DataRange1d()}
+        circle2 = p.circle(x='START_DATE', y='EToF_MEAN', source=source, y_range_name='etof',
+                           legend_label='EToF_MEAN, Monthly (mm/month)', color='green', size=6)
+        p.line(x='START_DATE', y='EToF_MEAN', source=source, y_range_name='etof', color='green')
+        p.extra_y_ranges['etof'].renderers = [circle2]
+        p.title.text = 'SITE: ' + first['site_name'] + ', ' + first['site'] + ' - EToF_MEAN vs. ' + cfs_var
+        p.xaxis.axis_label = 'Date'
+        p.yaxis.axis_label = cfs_var + ', Monthly (cfs)'
+        p.add_layout(LinearAxis(y_range_name="etof", axis_label='EToF_MEAN, Monthly (mm/month)'), 'right')
+        p.legend.click_policy = 'hide'
+        p.add_tools(HoverTool(renderers=[circle, circle2], tooltips=[
+            ('Year', '@year'), ('Month', '@month'), ('EToF_MEAN', '@EToF_MEAN'), ('Flow', '@flow')]))
+
+        # Scatter plot
+        p2 = figure(width=900, height=900)
+        p2.xgrid.grid_line_color = None
+        p2.ygrid.grid_line_color = None
+        circle3 = p2.circle(x='flow', y='EToF_MEAN', source=source, color='black', fill_color="#add8e6", size=8)
+        scatter_line = ColumnDataSource({'x': first_stats['line_x'], 'y': first_stats['line_y']})
+        p2.line(x='x', y='y', source=scatter_line, color='black')
+        scatter_label = Label(x=620, y=70, x_units='screen', y_units='screen', text=first_stats['label'])
+        p2.add_layout(scatter_label)
+        p2.title.text = 'SITE: ' + first['site_name'] + ', ' + first['site'] + ' - Flow vs. EToF'
+        p2.yaxis.axis_label = 'EToF_MEAN, Monthly (mm/month)'
+        p2.xaxis.axis_label = cfs_var + ', Monthly (cfs)'
+        p2.add_tools(HoverTool(renderers=[circle3], tooltips=[
+            ('Year', '@year'), ('Month', '@month'), ('EToF_MEAN', '@EToF_MEAN'), ('Flow', '@flow')]))
+
+        # Monthly scatter plots, all drawn from the same source through a filtered view
+        month_figs, month_lines, month_labels = [], [], []
+        for i, month_name in enumerate(months.MONTH_NAMES):
+            p_month = figure(width=450, height=450)
+            p_month.xgrid.grid_line_color = None
+            p_month.ygrid.grid_line_color = None
+            circle4 = p_month.circle(x='flow', y='EToF_MEAN', source=source,
+                                     view=CDSView(filter=GroupFilter(column_name='month', group=month_name)),
+                                     color='black', fill_color="#add8e6", size=8)
+            month_stats = first_stats['months'][i]
+            month_line = ColumnDataSource({'x': month_stats['line_x'], 'y': month_stats['line_y']})
+            p_month.line(x='x', y='y', source=month_line, color='black')
+            month_label = Label(x=255, y=20, x_units='screen', y_units='screen', text_font_size='8pt',
+                                text=month_stats['label'])
+            p_month.add_layout(month_label)
+            p_month.title.text = month_name + ' - ' + first['site_name'] + ', ' + first['site']
+            p_month.yaxis.axis_label = 'EToF_MEAN, Monthly (mm/month)'
+            p_month.xaxis.axis_label = cfs_var + ', Monthly (cfs)'
+            p_month.add_tools(HoverTool(renderers=[circle4], tooltips=[
+                ('Year', '@year'), ('EToF_MEAN', '@EToF_MEAN'), ('Flow', '@flow')]))
+            month_figs.append(p_month)
+            month_lines.append(month_line)
+            month_labels.append(month_label)
+
+        callback = dashboard.load_callback(
+            dict(site_select=site_select, var_select=var_select, source=source,
+                 scatter_line=scatter_line, scatter_label=scatter_label,
+                 month_lines=month_lines, month_labels=month_labels,
+                 month_titles=[fig.title for fig in month_figs], month_names=months.MONTH_NAMES,
+                 series_title=p.title, scatter_title=p2.title,
+                 flow_axes=[p.yaxis[0], p2.xaxis[0]] + [fig.xaxis[0] for fig in month_figs]),
+            'site_select.value', DASHBOARD_SHOW_JS, os.path.basename(data_dir))
+        site_select.js_on_change('value', callback)
+        var_select.js_on_change('value', callback)
+
+    with instrument.stage('write'):
+        output.save_html(column(row(site_select, var_select), p, p2, layout.grid(month_figs, ncols=4)), page_path,
+                         title='EToF vs. Flow by Site')
+    build.record([page_path] + sidecar_paths, inputs, __file__, list(cfs_vars) + [fit])
+
+
+# Bootstrap confidence intervals and permutation p-values of the monthly correlations of every site
+# (see 'ucrb/resample.py'), for the tables.
+def compute_resampled_stats(site_list, cfs_vars, resamples, seed=resample.DEFAULT_SEED):
+    df_data = pd.concat([load_raw_data_and_join(site) for site in site_list], ignore_index=True)
+    with instrument.stage('compute', rows=len(df_data)):
+        return resample.resample_stats(df_data, cfs_vars, 'EToF_MEAN', by=['station_id', 'month'],
+                                       resamples=resamples, seed=seed)
+
+
+# The statistics in the tables, each on a sheet of its own per 'cfs' variable: (column, title)
+TABLE_STATS = [('pearson_r', 'Pearson Correlation Coefficient: R'),
+               ('pearson_p', 'Pearson P-value'),
+               ('kendall_tau', "Kendall's Correlation: Tau"),
+               ('kendall_p', 'Kendall P-value')]
+
+# The resampled stats (see 'compute_resampled_stats') that are added when there are any: (column, title)
+RESAMPLED_STATS = [('pearson_perm_p', 'Pearson Permutation P-value'),
+                   ('pearson_r_low', 'Pearson Bootstrap 95% CI: lower R'),
+                   ('pearson_r_high', 'Pearson Bootstrap 95% CI: upper R'),
+                   ('kendall_perm_p', 'Kendall Permutation P-value'),
+                   ('kendall_tau_low', 'Kendall Bootstrap 95% CI: lower Tau'),
+                   ('kendall_tau_high', 'Kendall Bootstrap 95% CI: upper Tau')]
+
+
+# Exports the monthly Pearson and Kendall stats from 'compute_stats' of every 'cfs' variable into one
+# workbook, 'tables/correlations_EToF.xlsx', with a sheet per variable and statistic (a row per site,
+# a column per month). If 'df_resampled' (from 'compute_resampled_stats') is given, its permutation
+# p-values and bootstrap confidence intervals get sheets too. 'formats' can add Parquet and CSV copies
+# of the same tables (see 'ucrb/export.py').
+def make_tables(site_list, cfs_vars, df_monthly_stats, df_resampled=None, resamples=0, seed=resample.DEFAULT_SEED,
+                formats=('xlsx',)):
+
+    path_stem = os.path.join(TASK_DIR, 'tables', 'correlations_EToF')
+    table_paths = export.table_paths(path_stem, formats)
+
+    # The tables hold every site, so they are redone when any of the sites' raw files changed.
+    inputs = [path for site in site_list for path in site_inputs(site)] + [store.table_paths('metadata')[0]]
+    extra = [list(cfs_vars), resamples, seed]
+    if build.up_to_date(table_paths, inputs, __file__, extra):
+        return
+
+    site_names = load_site_names()
+
+    # Every table of every variable is assembled in one step from the stats (see 'ucrb/export.py').
+    with instrument.stage('compute', rows=len(site_list)):
+        blocks = [(df_monthly_stats, TABLE_STATS)]
+        if df_resampled is not None:
+            blocks.append((df_resampled, RESAMPLED_STATS))
+        titles = {}
+        tables = {}
+        for df_stats, table_stats in blocks:
+            titles.update(table_stats)
+            tables.update(export.monthly_tables(df_stats.round(3), site_list, cfs_vars,
+                                                [column for column, _ in table_stats], site_names,
+                                                month_names=months.FULL_MONTH_NAMES))
+        sheets = {export.sheet_name(cfs_var, column): (titles[column] + ' - EToF vs. ' + cfs_var,
+                                                       tables[(cfs_var, column)])
+                  for cfs_var in cfs_vars for column in titles}
+
+    with instrument.stage('write', rows=len(site_list) * len(sheets)):
+        export.write_tables(path_stem, sheets, formats)
+
+    build.record(table_paths, inputs, __file__, extra)
+
+
+def add_arguments(parser):
+    parser.add_argument('--vars', nargs='+', default=CFS_VARS, metavar='VAR',
+                        help="'cfs' variables of the monthly flow summaries to compare against EToF "
+                             '(default: ' + ','.join(CFS_VARS) + ')')
+    tasks.add_sites_argument(parser)
+    parser.add_argument('--dashboard', action='store_true',
+                        help="also make the single page dashboard 'plots/dashboard.html'")
+    parser.add_argument('--no-site-plots', action='store_true',
+                        help='skip the separate html files of every site (use with --dashboard)')
+    parser.add_argument('--fit', choices=stats.FITS, default='ols',
+                        help='regression line on the plots: ols (least squares, default), theil_sen '
+                             "(Sen's slope) or weighted (least squares weighted by PIXEL_COUNT)")
+    parser.add_argument('--resamples', type=int, default=resample.requested_resamples(),
+                        help='add permutation p-values and bootstrap confidence intervals from this many '
+                             'resamples to the tables (e.g. 2000; default: UCRB_RESAMPLES or 0, which '
+                             'leaves them out)')
+    parser.add_argument('--seed', type=int, default=resample.DEFAULT_SEED,
+                        help='seed of the resampling, for reproducible tables')
+    tasks.add_formats_argument(parser)
+
+
+def run(args):
+    # The sites with both ET and monthly flow data that the metadata marks as available, as zero padded
+    # station ids (see 'ucrb/stations.py').
+    site_list = tasks.select_sites(stations.discover_sites('et_monthly', 'flow_monthly'), args.sites)
+    if not site_list:
+        print("ERROR: NO SITES WITH BOTH ET AND MONTHLY FLOW DATA")
+        exit(1)
+    cfs_vars = tasks.split_list(args.vars)
+    missing = [var for var in cfs_vars if var not in load_raw_data_and_join(site_list[0]).columns]
+    if missing:
+        print("ERROR: UNKNOWN VARIABLES: " + ', '.join(missing))
+        exit(1)
+
+    df_site_stats, df_monthly_stats = compute_stats(site_list, cfs_vars, args.fit)
+    df_resampled = None
+    if args.resamples > 0:
+        df_resampled = compute_resampled_stats(site_list, cfs_vars, args.resamples, args.seed)
+
+    if not args.no_site_plots:
+        for cfs_var in cfs_vars:
+            make_plots(site_list, cfs_var, df_site_stats, df_monthly_stats, args.fit)
+    if args.dashboard:
+        make_dashboard(site_list, cfs_vars, df_site_stats, df_monthly_stats, args.fit)
+    make_tables(site_list, cfs_vars, df_monthly_stats, df_resampled, args.resamples, args.seed,
+                tasks.select_formats(args.formats))
+
+
+def main(argv=None):
+    tasks.main('task3', argv)
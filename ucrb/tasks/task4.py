@@ -0,0 +1,218 @@
+# Task 4
+# Two steps:
+#   csv    the mean growing season flow of every site, from its daily flow file, joined with the
+#          riparian ET means into 'raw_data/growing_season_et_and_flow.csv' (read by tasks 4, 5 and 6)
+#   plots  the growing season EToF against the mean growing season flow of every site
+import os
+import pandas as pd
+from scipy import stats
+
+from ucrb import aggregate, build, cache, instrument, plotting, runner, stations, store, tasks
+
+DESCRIPTION = 'growing season mean flow table and plots.'
+
+STEPS = ['csv', 'plots', 'all']
+
+# Outputs are written into the task's folder, whatever the working directory is.
+TASK_DIR = tasks.task_dir('task4')
+
+OUTPUT_PATH = os.path.join(TASK_DIR, 'growing_season_.html')
+
+
+#######################################################
+# Growing season flow table (csv step)
+
+# Loads in the et data
+def load_et_data():
+    with instrument.stage('load') as record:
+        try:
+            df_et = instrument.count(record, store.load_riparian_means())
+        except:
+            print("ERROR WHEN READING ET DATA")
+            exit(1)
+
+    return df_et
+
+
+# Calculates the mean growing season flow of one site from its daily flow file.
+# The station id is used as the index so that the sites can be differentiated from
+# each other when the results are combined into one big data frame.
+# Runs on its own in a worker process (see 'ucrb/runner.py').
+# The result is cached on disk ('data_store/cache'), so a site is only aggregated again
+# when its daily flow file changed.
+def site_growing_season_flow(site):
+    path = store.table_paths('flow_daily', site)[0]
+    with instrument.stage('compute', site) as record:
+        return instrument.count(record, cache.cached_frame('growing_season_flow_' + site, [path],
+                                                           lambda: group_by_and_agg(path, site), persist=True,
+                                                           version=3))
+
+
+# Calculates the mean growing season flow (Apr - Sept) of every year in a daily flow file.
+# The file is streamed in chunks and only running sums and counts per year are kept
+# (see 'ucrb/aggregate.py'), so memory does not grow with the length of the record.
+def group_by_and_agg(path, site):
+    try:
+        df_yearly_by_site = aggregate.stream_season_means({site: path}, aggregate.GROWING_SEASON_MONTHS,
+                                                          'discharge_cfs', key_name='station_id')
+    except:
+        print("ERROR WHEN READING DATA FROM: " + path)
+        exit(1)
+
+    # Formatting changes to the table
+    df_yearly_by_site.rename(columns={'discharge_cfs': 'mean_gs_flow'}, inplace=True)
+
+    return df_yearly_by_site
+
+
+def make_csv():
+    # The sites with daily flow and riparian ET data that the metadata marks as available
+    # (see 'ucrb/stations.py').
+    site_list = stations.discover_sites('flow_daily', 'riparian_means')
+
+    # Nothing is done if the csv was already made from the same raw files by the same code.
+    output_path = store.table_paths('growing_season')[0]
+    inputs = [store.table_paths('flow_daily', site)[0] for site in site_list] + \
+             [store.table_paths('riparian_means')[0], store.table_paths('metadata')[0]]
+    if build.up_to_date([output_path], inputs, __file__):
+        print('Up to date: ' + output_path)
+        return
+
+    # Loads in the et data
+    df_et = load_et_data()
+
+    # Calculates the mean growing season flow of every site in parallel and
+    # combines the results (in 'site_list' order) into 1 big table.
+    df_flow = pd.concat(runner.run_sites(site_growing_season_flow, site_list)).reset_index()
+
+    # Join Data and export to csv.
+    # The join is on the integer station codes and the year (see 'ucrb/stations.py').
+    # The csv goes into the shared 'raw_data' folder because tasks 4, 5 and 6 all read it from the store.
+    with instrument.stage('join') as record:
+        df_data = stations.with_codes(df_et).merge(stations.with_codes(df_flow), on=['station_id', 'year'], how='left')
+        instrument.count(record, df_data)
+    with instrument.stage('write', rows=len(df_data)):
+        df_data.to_csv(output_path)
+    build.record([output_path], inputs, __file__)
+
+
+#######################################################
+# Growing season plots (plots step)
+
+# Read in the metadata so that the site names can be attached to the graph.
+def load_site_names():
+    try:
+        return stations.site_names()
+    except:
+        print("ERROR WITH READING METADATA")
+        exit(1)
+
+
+# Read in Data
+# The rows of every site are found through one groupby on the integer station codes.
+def load_raw_data():
+    with instrument.stage('load') as record:
+        try:
+            df = instrument.count(record, stations.with_codes(store.load_growing_season()))
+        except:
+            print("ERROR WHEN READING IN DATA")
+            exit(1)
+    return df
+
+
+def make_plots(site_list):
+    from bokeh.models import ColumnDataSource
+    from bokeh.models.annotations import Label
+    from bokeh.models.tools import HoverTool
+    from bokeh.plotting import figure
+    from ucrb import layout
+
+    # The plot is only made again when its inputs or the code changed since it was last made
+    # (see 'ucrb/build.py'). Set UCRB_FORCE=1 to always make it.
+    inputs = [store.table_paths('growing_season')[0], store.table_paths('metadata')[0]]
+    # Every page of the plots is checked, not only the first (see 'ucrb/layout.py').
+    if build.up_to_date(build.pages(OUTPUT_PATH), inputs, __file__, site_list):
+        print('Up to date: ' + OUTPUT_PATH)
+        return
+
+    site_names = load_site_names()
+    df_by_site = load_raw_data().groupby('station_id', observed=True)
+
+    # Monthly scatter plot
+    list_of_monthly_figs = []
+
+    for site in site_list:
+
+        site_name = site_names[site]
+        df_station = df_by_site.get_group(site)
+
+        with instrument.stage('render', site, rows=len(df_station)):
+            p_site = figure(width=500, height=500)
+            p_site.xgrid.grid_line_color = None
+            p_site.ygrid.grid_line_color = None
+            circle = p_site.circle(x='mean_gs_flow', y='gs_etof',
+                          source=ColumnDataSource(df_station[['year', 'mean_gs_flow', 'gs_etof']]),
+                          color='black', fill_color="#add8e6",
+                          size=8)
+
+
+            p_site.title.text = site_name + ': Growing Season EtoF vs Mean Flow'
+            p_site.title.text_font_size = '9pt'
+            p_site.yaxis.axis_label = 'Growing Season EtoF'
+            p_site.xaxis.axis_label = 'Growing Season Mean Flow - cfs'
+
+            # Calculate and draw the least-square regression line (see 'ucrb/plotting.py')
+            slope, intercept = plotting.add_regression_line(p_site, df_station['mean_gs_flow'], df_station['gs_etof'])
+
+            # Calculations to be used in the stats label on every scatter plot
+            pearson_r, pearson_p = stats.pearsonr(df_station['gs_etof'], df_station['mean_gs_flow'])
+            kendall_r, kendall_p = stats.kendalltau(df_station['gs_etof'], df_station['mean_gs_flow'])
+
+            # The stats label to be added.
+            label_text = 'Slope: ' + str(round(slope * 1e4 , 3)) + ' 1e-4' + '\n' + \
+                         'Intercept: ' + str(round(intercept, 3)) + '\n' + \
+                         'Pearson r: ' + str(round(pearson_r, 3)) + '\n' + \
+                         'Pearson P-Value: ' + str(round(pearson_p, 3)) + '\n' + \
+                         'Kendall Tau: ' + str(round(kendall_r, 3)) + '\n' + \
+                         'Kendall P-Value: ' + str(round(kendall_p, 3)) + '\n' + \
+                         'n: ' + str(len(df_station))
+            label = Label(x=320, y=20, x_units='screen', y_units='screen',
+                          text_font_size='8pt', text=label_text)
+            p_site.add_layout(label)
+
+            hover = HoverTool()
+            hover.renderers = [circle]
+            hover.tooltips = [
+                ('Year', '@year'),
+                ('Growing Season EToF;', '@gs_etof'),
+                ('Mean Discharge', '@mean_gs_flow')
+            ]
+            p_site.add_tools(hover)
+
+            list_of_monthly_figs.append(p_site)
+
+    # The plots are tiled 3 to a row, over more than one page if there are too many sites (see 'ucrb/layout.py').
+    with instrument.stage('write', rows=len(list_of_monthly_figs)):
+        paths = layout.save_grid(list_of_monthly_figs, OUTPUT_PATH, ncols=3)
+    build.record(paths, inputs, __file__, site_list, paged=True)
+
+
+def add_arguments(parser):
+    parser.add_argument('--step', choices=STEPS, default='all',
+                        help='csv: only make the growing season flow table; plots: only draw the plots; '
+                             'all: both (default)')
+    parser.add_argument('--sites', nargs='+', metavar='STATION_ID',
+                        help='only plot these stations (the table always holds every station)')
+
+
+def run(args):
+    if args.step in ['csv', 'all']:
+        make_csv()
+    if args.step in ['plots', 'all']:
+        # The sites of the growing season table that the metadata marks as available, as zero padded
+        # station ids (see 'ucrb/stations.py').
+        make_plots(tasks.select_sites(stations.discover_sites('growing_season'), args.sites))
+
+
+def main(argv=None):
+    tasks.main('task4', argv)
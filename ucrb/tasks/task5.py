@@ -0,0 +1,119 @@
+# Task 5
+import os
+import pandas as pd
+from scipy import stats
+
+from ucrb import build, instrument, output, plotting, stations, store, tasks
+
+DESCRIPTION = 'normalized growing season EToF vs. mean flow of every site in one plot.'
+
+# Outputs are written into the task's folder, whatever the working directory is.
+TASK_DIR = tasks.task_dir('task5')
+
+OUTPUT_PATH = os.path.join(TASK_DIR, 'normalized_growing_season.html')
+
+
+# Read in Data
+def load_raw_data():
+    with instrument.stage('load') as record:
+        try:
+            df = instrument.count(record, stations.with_codes(store.load_growing_season()))
+        except:
+            print("ERROR WHEN READING IN DATA")
+            exit(1)
+    return df
+
+
+# Normalizes the growing season flow of every site by its mean and stacks the sites into one DataFrame.
+def normalize(df, site_list):
+    df_by_site = df.groupby('station_id', observed=True)
+
+    with instrument.stage('compute', rows=len(df)):
+        list_of_dfs = []
+        for site in site_list:
+
+            # Break data down by Site
+            df_station = df_by_site.get_group(site)
+
+            # Normalize the Data
+            mean = df_station['mean_gs_flow'].mean()
+            df_station = df_station.assign(discharge_mean_cfs=lambda x: (x['mean_gs_flow'] / mean))
+            list_of_dfs.append(df_station)
+        return pd.concat(list_of_dfs)
+
+
+def make_plot(df):
+    from bokeh.models import ColumnDataSource
+    from bokeh.models.annotations import Label
+    from bokeh.models.tools import HoverTool
+    from bokeh.plotting import figure
+
+    with instrument.stage('render', rows=len(df)):
+        p = figure(width=900, height=900)
+        p.xgrid.grid_line_color = None
+        p.ygrid.grid_line_color = None
+        circle = p.circle(x='mean_gs_flow', y='gs_etof',
+                    source=ColumnDataSource(df),
+                    color='black', fill_color="#add8e6",
+                    size=8)
+
+        p.title.text = 'Normalized Growing Season EToF vs Normalized Mean Flow'
+        p.title.text_font_size = '9pt'
+        p.yaxis.axis_label = 'Growing Season EToF'
+        p.xaxis.axis_label = 'Normalized Growing Season Mean Flow - cfs'
+
+        # Calculate and draw the least-square regression line (see 'ucrb/plotting.py')
+        slope, intercept = plotting.add_regression_line(p, df['mean_gs_flow'], df['gs_etof'])
+
+        # Calculations to be used in the stats label on every scatter plot
+        pearson_r, pearson_p = stats.pearsonr(df['gs_etof'], df['mean_gs_flow'])
+        kendall_r, kendall_p = stats.kendalltau(df['gs_etof'], df['mean_gs_flow'])
+
+        # The stats label to be added.
+        label_text = 'Slope: ' + str(round(slope, 3)) + '\n' + \
+                     'Intercept: ' + str(round(intercept, 3)) + '\n' + \
+                     'Pearson r: ' + str(round(pearson_r, 3)) + '\n' + \
+                     'Pearson P-Value: ' + str(round(pearson_p, 3)) + '\n' + \
+                     'Kendall Tau: ' + str(round(kendall_r, 3)) + '\n' + \
+                     'Kendall P-Value: ' + str(round(kendall_p, 3)) + '\n' + \
+                     'n: ' + str(len(df))
+        label = Label(x=700, y=20, x_units='screen', y_units='screen',
+                     text_font_size='8pt', text=label_text)
+        p.add_layout(label)
+
+        hover = HoverTool()
+        hover.renderers = [circle]
+        hover.tooltips = [
+            ('Year', '@year'),
+            ('Site', '@site_name'),
+            ('Growing Season EToF', '@gs_etof'),
+            ('Normalized Growing Season Mean Discharge', '@mean_gs_flow')
+        ]
+        p.add_tools(hover)
+
+    with instrument.stage('write'):
+        output.save_html(p, OUTPUT_PATH)
+
+
+def add_arguments(parser):
+    tasks.add_sites_argument(parser)
+
+
+def run(args):
+    # The sites of the growing season table that the metadata marks as available, as zero padded
+    # station ids (see 'ucrb/stations.py').
+    site_list = tasks.select_sites(stations.discover_sites('growing_season'), args.sites)
+
+    # The plot is only made again when its inputs or the code changed since it was last made
+    # (see 'ucrb/build.py'). Set UCRB_FORCE=1 to always make it.
+    inputs = [store.table_paths('growing_season')[0], store.table_paths('metadata')[0]]
+    if build.up_to_date([OUTPUT_PATH], inputs, __file__, site_list):
+        print('Up to date: ' + OUTPUT_PATH)
+        return
+
+    make_plot(normalize(load_raw_data(), site_list))
+    build.record([OUTPUT_PATH], inputs, __file__, site_list)
+
+
+def main(argv=None):
+    tasks.main('task5', argv)
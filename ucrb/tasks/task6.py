@@ -0,0 +1,230 @@
+# Task 6
+import pandas as pd
+from scipy import stats
+import os
+
+from ucrb import build, datasets, instrument, output, plotting, stations, store, tasks
+
+DESCRIPTION = 'growing season flow vs. annual, water year and growing season precipitation plots.'
+
+# Outputs are written into the task's folder, whatever the working directory is.
+TASK_DIR = tasks.task_dir('task6')
+
+# This dict is used to transform the var names of the columns into
+# more readable names to be used in the plot displays.
+dict_var_to_string_conversion = {
+    'mean_gs_flow': 'Mean Growing Season Flow (cfs)',
+    'ann_pr': 'Annual Precipitation (PLACE HOLDER VAR)',
+    'wy_pr': 'Water Year Precipitation (PLACE HOLDER VAR)',
+    'gs_pr': 'Growing Season Precipitation (PLACE HOLDER VAR)'
+}
+
+# Read in the metadata so that the site names can be attached to the graph.
+def load_site_names():
+    try:
+        return stations.site_names()
+    except:
+        print("ERROR WITH READING METADATA")
+        exit(1)
+
+
+# Reads the growing season data and the precipitation means joined into a single DataFrame
+# (see 'ucrb/datasets.py').
+def load_raw_data_and_join():
+    with instrument.stage('join') as record:
+        try:
+            df_data = instrument.count(record, datasets.growing_season_pr())
+        except:
+            print("ERROR WHEN READING IN DATA")
+            exit(1)
+
+    return df_data
+
+
+# The raw files that every plot of this task is made from.
+# A plot is only made again when one of them or the code changed since it was last made
+# (see 'ucrb/build.py'). Set UCRB_FORCE=1 to always make it.
+def plot_inputs():
+    return [store.table_paths('growing_season')[0], store.table_paths('pr_means')[0],
+            store.table_paths('metadata')[0]]
+
+
+# Takes in 2 strings that correspond to the 2 variables that will be charted on
+# the x and y axes of the scatter plot. This function will create a 6 x 2 grid of
+# plots where each plot corresponds to a site.
+def create_site_plots(list_site, fl_var, pr_var):
+    from bokeh.models import ColumnDataSource
+    from bokeh.models.annotations import Label
+    from bokeh.models.tools import HoverTool
+    from bokeh.plotting import figure
+    from ucrb import layout
+
+    output_path = os.path.join(TASK_DIR, 'plots', fl_var + '_vs_' + pr_var + '.html')
+    # Every page of the plots is checked, not only the first (see 'ucrb/layout.py').
+    if build.up_to_date(build.pages(output_path), plot_inputs(), __file__, list_site):
+        print('Up to date: ' + output_path)
+        return
+
+    # Data is loaded in
+    df_data = load_raw_data_and_join()
+    df_by_site = df_data.groupby('station_id', observed=True)
+    site_names = load_site_names()
+
+    # A plot is created for each site and then appended onto 'list_of_monthly_figs'
+    list_of_monthly_figs = []
+    for site in list_site:
+
+        site_name = site_names[site]
+        df_station = df_by_site.get_group(site)
+
+        with instrument.stage('render', site, rows=len(df_station)):
+            p_site = figure(width=500, height=500)
+            p_site.xgrid.grid_line_color = None
+            p_site.ygrid.grid_line_color = None
+            circle = p_site.circle(x=pr_var, y=fl_var,
+                                   source=ColumnDataSource(df_station[['year', pr_var, fl_var]]),
+                                   color='black', fill_color="#add8e6",
+                                   size=8)
+
+            p_site.title.text = site_name + '\n' + dict_var_to_string_conversion[fl_var] + ' vs '\
+                                                 + dict_var_to_string_conversion[pr_var]
+            p_site.title.text_font_size = '9pt'
+            p_site.yaxis.axis_label = dict_var_to_string_conversion[fl_var]
+            p_site.xaxis.axis_label = dict_var_to_string_conversion[pr_var]
+
+            # Calculate and draw the least-square regression line (see 'ucrb/plotting.py')
+            slope, intercept = plotting.add_regression_line(p_site, df_station[pr_var], df_station[fl_var])
+
+            # Calculations to be used in the stats label on every scatter plot
+            pearson_r, pearson_p = stats.pearsonr(df_station[fl_var], df_station[pr_var])
+            kendall_r, kendall_p = stats.kendalltau(df_station[fl_var], df_station[pr_var])
+
+            # The stats label to be added.
+            label_text = 'Slope: ' + str(round(slope, 3)) + '\n' + \
+                         'Intercept: ' + str(round(intercept, 3)) + '\n' + \
+                         'Pearson r: ' + str(round(pearson_r, 3)) + '\n' + \
+                         'Pearson P-Value: ' + str(round(pearson_p, 3)) + '\n' + \
+                         'Kendall Tau: ' + str(round(kendall_r, 3)) + '\n' + \
+                         'Kendall P-Value: ' + str(round(kendall_p, 3)) + '\n' + \
+                         'n: ' + str(len(df_station))
+            label = Label(x=320, y=20, x_units='screen', y_units='screen',
+                          text_font_size='8pt', text=label_text)
+            p_site.add_layout(label)
+
+            # This hover tool used to display the data for each point on the plot
+            hover = HoverTool()
+            hover.renderers = [circle]
+            hover.tooltips = [
+                ('Year', '@year'),
+                (dict_var_to_string_conversion[pr_var], '@' + pr_var),
+                (dict_var_to_string_conversion[fl_var], '@' + fl_var)
+            ]
+            p_site.add_tools(hover)
+
+            list_of_monthly_figs.append(p_site)
+
+    # Save the plots 3 to a row in the 'plots' directory, over more than one page if there are
+    # too many sites to fit in one (see 'ucrb/layout.py').
+    with instrument.stage('write', rows=len(list_of_monthly_figs)):
+        paths = layout.save_grid(list_of_monthly_figs, output_path, ncols=3)
+    build.record(paths, plot_inputs(), __file__, list_site, paged=True)
+
+
+# Creates a massive scatter plot that contains all the sites.
+# Each growing season value is normalized by dividing
+def create_normalized_combined_plot(list_site, fl_var, pr_var):
+    from bokeh.models import ColumnDataSource
+    from bokeh.models.annotations import Label
+    from bokeh.models.tools import HoverTool
+    from bokeh.plotting import figure
+
+    output_path = os.path.join(TASK_DIR, 'plots', 'normalized_' + fl_var + '_vs_' + pr_var + '.html')
+    if build.up_to_date([output_path], plot_inputs(), __file__, list_site):
+        print('Up to date: ' + output_path)
+        return
+
+    df_data = load_raw_data_and_join()
+    df_by_site = df_data.groupby('station_id', observed=True)
+
+    with instrument.stage('compute', rows=len(df_data)):
+        list_of_dfs = []
+        for site in list_site:
+
+            # Break data down by Site
+            df_station = df_by_site.get_group(site)
+
+            # Normalize the Data
+            mean = df_station['mean_gs_flow'].mean()
+            df_station = df_station.assign(discharge_mean_cfs=lambda x: (x['mean_gs_flow'] / mean))
+            list_of_dfs.append(df_station)
+        df = pd.concat(list_of_dfs)
+
+    with instrument.stage('render', rows=len(df)):
+        p = figure(width=900, height=900)
+        p.xgrid.grid_line_color = None
+        p.ygrid.grid_line_color = None
+        circle = p.circle(x=pr_var, y=fl_var,
+                          source=ColumnDataSource(df),
+                          color='black', fill_color="#add8e6",
+                          size=8)
+
+        p.title.text =  dict_var_to_string_conversion[fl_var] + ' vs ' \
+                            + dict_var_to_string_conversion[pr_var]
+        p.title.text_font_size = '15pt'
+        p.yaxis.axis_label = dict_var_to_string_conversion[fl_var]
+        p.xaxis.axis_label = dict_var_to_string_conversion[pr_var]
+
+        # Calculate and draw the least-square regression line (see 'ucrb/plotting.py')
+        slope, intercept = plotting.add_regression_line(p, df[pr_var], df[fl_var])
+
+        # Calculations to be used in the stats label on every scatter plot
+        pearson_r, pearson_p = stats.pearsonr(df[fl_var], df[pr_var])
+        kendall_r, kendall_p = stats.kendalltau(df[fl_var], df[pr_var])
+
+        # The stats label to be added.
+        label_text = 'Slope: ' + str(round(slope, 3)) + '\n' + \
+                     'Intercept: ' + str(round(intercept, 3)) + '\n' + \
+                     'Pearson r: ' + str(round(pearson_r, 3)) + '\n' + \
+                     'Pearson P-Value: ' + str(round(pearson_p, 3)) + '\n' + \
+                     'Kendall Tau: ' + str(round(kendall_r, 3)) + '\n' + \
+                     'Kendall P-Value: ' + str(round(kendall_p, 3)) + '\n' + \
+                     'n: ' + str(len(df))
+        label = Label(x=690, y=20, x_units='screen', y_units='screen',
+                      text_font_size='8pt', text=label_text)
+        p.add_layout(label)
+
+        hover = HoverTool()
+        hover.renderers = [circle]
+        hover.tooltips = [
+            ('Year', '@year'),
+            ('Site', '@site_name'),
+            (dict_var_to_string_conversion[fl_var], '@' + fl_var),
+            (dict_var_to_string_conversion[pr_var], '@' + pr_var)
+        ]
+        p.add_tools(hover)
+
+    with instrument.stage('write'):
+        output.save_html(p, output_path)
+    build.record([output_path], plot_inputs(), __file__, list_site)
+
+
+def add_arguments(parser):
+    tasks.add_sites_argument(parser)
+
+
+def run(args):
+    # The sites of the growing season and precipitation tables that the metadata marks as available, as zero padded
+    # station ids (see 'ucrb/stations.py').
+    list_site = tasks.select_sites(stations.discover_sites('growing_season', 'pr_means'), args.sites)
+
+    create_site_plots(list_site, 'mean_gs_flow', 'ann_pr')
+    create_site_plots(list_site, 'mean_gs_flow', 'wy_pr')
+    create_site_plots(list_site, 'mean_gs_flow', 'gs_pr')
+
+    create_normalized_combined_plot(list_site, 'mean_gs_flow', 'ann_pr')
+    create_normalized_combined_plot(list_site, 'mean_gs_flow', 'wy_pr')
+    create_normalized_combined_plot(list_site, 'mean_gs_flow', 'gs_pr')
+
+
+def main(argv=None):
+    tasks.main('task6', argv)
@@ -0,0 +1,198 @@
+# Task 7
+# Correlation matrices, heatmaps and scatter plots of the growing season and annual ET and
+# precipitation of every site. Everything is written to files with a headless backend, so this can
+# run in batch jobs:
+#   ucrb run task7                                          every site and variable
+#   ucrb run task7 --sites 09379500 --vars gs_pr,gs_et,gs_etof
+import os
+import pandas as pd
+import numpy as np
+
+from ucrb import build, heatmaps, instrument, matrices, output, resample, stations, store, tasks
+
+DESCRIPTION = 'correlation matrices, heatmaps and scatter plots of the growing season ET and precipitation.'
+
+# Outputs are written into the task's folder, whatever the working directory is.
+TASK_DIR = tasks.task_dir('task7')
+PLOTS_DIR = os.path.join(TASK_DIR, 'plots')
+MATRICES_PATH = os.path.join(TASK_DIR, 'correlation_matrices.npz')
+RESAMPLED_PATH = os.path.join(TASK_DIR, 'resampled_correlations.csv')
+SCATTER_MATRIX_PATH = os.path.join(PLOTS_DIR, 'scatter_matrix.png')
+
+var_list = ['gs_pr', 'ann_pr', 'wy_pr', 'gs_et',
+       'gs_etof', 'gs_eto', 'ann_et', 'ann_etof', 'ann_eto']
+
+# The single scatter plots that are looked at the most: (x, y)
+PAIR_PLOTS = [('gs_etof', 'gs_et'), ('gs_eto', 'gs_et'), ('ann_pr', 'gs_etof'), ('wy_pr', 'gs_et')]
+
+# Above this many points a panel of the scatter matrix shows the point density (hexagonal bins)
+# instead of every point.
+HEXBIN_POINTS = 20000
+
+
+# Read the data into two DataFrames and then joins the DataFrames into a single DataFrame
+# Only the rows of 'sites' (zero padded station ids) are kept, if given.
+def load_joined_data(sites=None):
+    with instrument.stage('load') as record:
+        try:
+            et_df = store.load_riparian_means()
+            pr_df = store.load_pr_means()
+        except:
+            print("ERROR WHEN READING IN DATA")
+            exit(1)
+        record['rows'] = len(et_df) + len(pr_df)
+
+    with instrument.stage('join') as record:
+        # The join is on the integer station codes and the year (see 'ucrb/stations.py').
+        joined_df = pd.merge(stations.with_codes(pr_df), stations.with_codes(et_df.drop(columns='site_name')),
+                             how='left', on=['station_id', 'year'])
+
+        # site filter
+        if sites:
+            joined_df = joined_df[joined_df['station_id'].cat.codes.isin(stations.codes(sites))]
+        instrument.count(record, joined_df)
+    return joined_df
+
+
+def input_paths():
+    return [store.table_paths('riparian_means')[0], store.table_paths('pr_means')[0]]
+
+
+def pair_plot_path(x_var, y_var):
+    return os.path.join(PLOTS_DIR, 'scatter_' + y_var + '_vs_' + x_var + '.png')
+
+
+# One scatter plot of y against x of every site together.
+def make_pair_plot(joined_df, x_var, y_var):
+    plt = tasks.pyplot()
+    with instrument.stage('render', rows=len(joined_df)):
+        fig, ax = plt.subplots()
+        joined_df.plot.scatter(x=x_var, y=y_var, c='DarkBlue', ax=ax)
+    path = pair_plot_path(x_var, y_var)
+    with instrument.stage('write'):
+        fig.savefig(path)
+        plt.close(fig)
+    return path
+
+
+# The scatter plots of every pair of variables in one figure: the lower triangle holds the scatter
+# plots (sharing their x axis down every column), the diagonal the histogram of every variable.
+def make_scatter_matrix(joined_df, variables, path):
+    plt = tasks.pyplot()
+    with instrument.stage('render', rows=len(joined_df)):
+        k = len(variables)
+        fig, axes = plt.subplots(k, k, figsize=(2.5 * k, 2.5 * k), sharex='col', squeeze=False)
+        fig.suptitle('Scatter Matrix - ' + str(joined_df['station_id'].nunique()) + ' Sites', fontsize=16)
+        values = {var: joined_df[var].to_numpy(dtype=float) for var in variables}
+
+        for i, y_var in enumerate(variables):
+            for j, x_var in enumerate(variables):
+                ax = axes[i, j]
+                if j > i:
+                    ax.set_visible(False)
+                    continue
+                if i == j:
+                    x = values[x_var][np.isfinite(values[x_var])]
+                    ax.hist(x, bins=20, color='DarkBlue')
+                else:
+                    keep = np.isfinite(values[x_var]) & np.isfinite(values[y_var])
+                    x, y = values[x_var][keep], values[y_var][keep]
+                    if len(x) > HEXBIN_POINTS:
+                        ax.hexbin(x, y, gridsize=40, mincnt=1, cmap='viridis')
+                    else:
+                        ax.scatter(x, y, s=6, c='DarkBlue')
+                if i == k - 1:
+                    ax.set_xlabel(x_var)
+                if j == 0 and i > 0:
+                    ax.set_ylabel(y_var)
+
+        fig.tight_layout()
+
+    with instrument.stage('write'):
+        fig.savefig(path)
+        plt.close(fig)
+    return path
+
+
+# Permutation p-values and bootstrap 95% confidence intervals of both correlations for every pair of
+# variables (see 'ucrb/resample.py').
+def make_resampled_table(joined_df, variables, resamples, path):
+    with instrument.stage('compute', rows=len(joined_df)):
+        list_of_dfs = []
+        for i, y_var in enumerate(variables[:-1]):
+            df_pair_stats = resample.resample_stats(joined_df, variables[i + 1:], y_var, by=[], resamples=resamples)
+            list_of_dfs.append(df_pair_stats.reset_index().assign(y_var=y_var))
+        resampled_df = pd.concat(list_of_dfs, ignore_index=True)
+        resampled_df = resampled_df[['y_var', 'x_var'] + resample.RESAMPLE_COLUMNS].round(3)
+    with instrument.stage('write', rows=len(resampled_df)):
+        resampled_df.to_csv(path, index=False)
+    return path
+
+
+def add_arguments(parser):
+    parser.add_argument('--vars', nargs='+', default=var_list, metavar='VAR',
+                        help='variables to correlate (default: ' + ','.join(var_list) + ')')
+    tasks.add_sites_argument(parser)
+    parser.add_argument('--methods', nargs='+', choices=matrices.METHODS, default=matrices.METHODS,
+                        help='heatmaps to draw (default: all)')
+    parser.add_argument('--resamples', type=int, default=resample.requested_resamples(),
+                        help='resamples of the permutation p-values and bootstrap confidence intervals '
+                             '(e.g. 2000; default: UCRB_RESAMPLES or 0, which leaves them out)')
+
+
+def run(args):
+    args.vars = tasks.split_list(args.vars)
+    # The sites with riparian ET and precipitation data that the metadata marks as available
+    # (see 'ucrb/stations.py'); a requested site without data is an error.
+    site_list = tasks.select_sites(stations.discover_sites('riparian_means', 'pr_means'), args.sites)
+
+    joined_df = load_joined_data(site_list)
+    if joined_df.empty:
+        print("ERROR: NO DATA FOR SITES: " + ', '.join(site_list))
+        exit(1)
+    missing = [var for var in args.vars if var not in joined_df.columns]
+    if missing:
+        print("ERROR: UNKNOWN VARIABLES: " + ', '.join(missing))
+        exit(1)
+
+    # Every output is only made again when the data, the code or the arguments changed since it was
+    # last made (see 'ucrb/build.py'). Set UCRB_FORCE=1 to always make them.
+    sites = [str(site) for site in joined_df['station_id'].unique().sort_values()] + [matrices.POOLED]
+    pairs = [(x_var, y_var) for x_var, y_var in PAIR_PLOTS if x_var in args.vars and y_var in args.vars]
+    outputs = [MATRICES_PATH, SCATTER_MATRIX_PATH] + [pair_plot_path(x_var, y_var) for x_var, y_var in pairs] + \
+              [heatmaps.heatmap_path(PLOTS_DIR, site, method) for site in sites for method in args.methods]
+    if args.resamples > 0:
+        outputs.append(RESAMPLED_PATH)
+    extra = [args.vars, sites, args.methods, args.resamples]
+    if build.up_to_date(outputs, input_paths(), __file__, extra):
+        print('Up to date: ' + TASK_DIR)
+        return
+
+    output.ensure_dir(PLOTS_DIR)
+
+    # Pearson, Spearman and Kendall matrices of every site and of all sites pooled, with the p-value
+    # and number of pairs of every cell, in one pass (see 'ucrb/matrices.py'). They are kept in
+    # 'correlation_matrices.npz'; any site's matrices can be taken from them with 'matrices.site_matrix'.
+    with instrument.stage('compute', rows=len(joined_df)):
+        corr_matrices = matrices.correlation_matrices(joined_df, args.vars)
+    with instrument.stage('write'):
+        matrices.save_matrices(MATRICES_PATH, corr_matrices)
+
+    # The heatmaps of every site (and all sites), drawn and saved in parallel (see UCRB_WORKERS).
+    with instrument.stage('render', rows=len(sites)):
+        # Sets the headless backend that the workers draw with.
+        tasks.pyplot()
+        heatmaps.save_heatmaps(corr_matrices, PLOTS_DIR, methods=args.methods)
+
+    make_scatter_matrix(joined_df, args.vars, SCATTER_MATRIX_PATH)
+    for x_var, y_var in pairs:
+        make_pair_plot(joined_df, x_var, y_var)
+
+    if args.resamples > 0:
+        make_resampled_table(joined_df, args.vars, args.resamples, RESAMPLED_PATH)
+
+    build.record(outputs, input_paths(), __file__, extra)
+
+
+def main(argv=None):
+    tasks.main('task7', argv)